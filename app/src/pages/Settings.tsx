@@ -70,9 +70,11 @@ export function Settings() {
       return;
     }
     try {
-      const { api, useApi } = await import('@/lib/api');
+      const { api, useApi, setToken } = await import('@/lib/api');
       if (useApi()) {
-        await api.auth.changePassword(passwordForm.currentPassword, passwordForm.newPassword);
+        const res = await api.auth.changePassword(passwordForm.currentPassword, passwordForm.newPassword);
+        // 修改密码后旧 token 失效，改用接口返回的新 token
+        setToken(res.access_token);
       }
       toast.success('密码已修改');
       setPasswordForm({
@@ -0,0 +1,94 @@
+"""Initial schema (tables previously created by scripts/init_db.py create_all).
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "users",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("username", sa.String(50), nullable=False),
+        sa.Column("password_hash", sa.String(255), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+    op.create_table(
+        "categories",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(50), nullable=False),
+        sa.Column("color", sa.String(7), nullable=False),
+        sa.Column("icon", sa.String(50), nullable=True),
+        sa.Column("sort_order", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_table(
+        "subscriptions",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column(
+            "category_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("categories.id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+        sa.Column("provider", sa.String(100), nullable=True),
+        sa.Column("cost", sa.Numeric(10, 2), nullable=False),
+        sa.Column("currency", sa.String(10), nullable=False),
+        sa.Column("billing_cycle", sa.String(20), nullable=False),
+        sa.Column("start_date", sa.Date(), nullable=True),
+        sa.Column("expire_date", sa.Date(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("notify_days", postgresql.JSONB(), nullable=True),
+        sa.Column("url", sa.String(500), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_table(
+        "notifications",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "subscription_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("subscriptions.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("notify_type", sa.String(20), nullable=False),
+        sa.Column("message", sa.Text(), nullable=True),
+        sa.Column("sent_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("success", sa.Boolean(), nullable=False),
+        sa.Column("error_message", sa.Text(), nullable=True),
+    )
+    op.create_table(
+        "settings",
+        sa.Column("key", sa.String(50), primary_key=True),
+        sa.Column("value", sa.Text(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("settings")
+    op.drop_table("notifications")
+    op.drop_table("subscriptions")
+    op.drop_table("categories")
+    op.drop_index("ix_users_username", table_name="users")
+    op.drop_table("users")
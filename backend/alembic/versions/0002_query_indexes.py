@@ -0,0 +1,44 @@
+"""Indexes for the expire_date / category / start_date / sent_at access paths.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns); built CONCURRENTLY so existing installs stay writable.
+INDEXES = [
+    # Range filters on expire_date (stats, calendar, expiring, scheduler) and
+    # the (expire_date, id) keyset order of GET /api/subscriptions.
+    ("ix_subscriptions_expire_date_id", "subscriptions", ["expire_date", "id"]),
+    # Category filter with the same ordering, category counts and the
+    # ON DELETE SET NULL lookup.
+    ("ix_subscriptions_category_id_expire_date", "subscriptions", ["category_id", "expire_date", "id"]),
+    ("ix_subscriptions_start_date", "subscriptions", ["start_date"]),
+    ("ix_notifications_sent_at", "notifications", ["sent_at"]),
+    # ON DELETE CASCADE from subscriptions.
+    ("ix_notifications_subscription_id", "notifications", ["subscription_id"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,34 @@
+"""Dedup key on notifications: (subscription_id, notify_type, target_date).
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows keep target_date NULL, which never conflicts.
+    op.add_column("notifications", sa.Column("target_date", sa.Date(), nullable=True))
+    op.create_unique_constraint(
+        "uq_notifications_dedup",
+        "notifications",
+        ["subscription_id", "notify_type", "target_date"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint("uq_notifications_dedup", "notifications", type_="unique")
+    op.drop_column("notifications", "target_date")
@@ -1,38 +1,103 @@
 """FastAPI dependencies."""
+import hmac
+from dataclasses import dataclass
+from uuid import UUID
+
 from fastapi import Depends, HTTPException
 from fastapi import status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.config import settings
+from app.database import AsyncSessionLocal
 from app.models.user import User
-from app.core.security import decode_access_token
+from app.core.security import decode_access_token, password_fingerprint
+from app.services import change_feed
+from app.services.ttl_cache import MISSING, TTLCache
 
 security = HTTPBearer(auto_error=False)
 
+USERS_CHANNEL = "subtracker_users"
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """Detached snapshot of the authenticated user, safe to cache."""
+
+    id: UUID
+    username: str
+    password_hash: str
+
+
+# username -> CurrentUser, or None for a known-missing user
+_user_cache = TTLCache(settings.auth_user_cache_ttl_seconds)
+
+
+def _on_users_changed(username: str):
+    if username == change_feed.RESYNC:
+        _user_cache.clear()
+    else:
+        _user_cache.pop(username)
+
+
+change_feed.subscribe(USERS_CHANNEL, _on_users_changed)
+
+
+def invalidate_user(username: str):
+    """Drop username from this process's cache (see also notify_user_changed)."""
+    _user_cache.pop(username)
+
 
-def get_current_user(
-    db: Session = Depends(get_db),
+async def notify_user_changed(db: AsyncSession, username: str):
+    """Queue cache invalidation for username in every process on db's commit."""
+    await change_feed.notify_async(db, USERS_CHANNEL, username)
+
+
+def user_cache_stats() -> dict:
+    return _user_cache.stats()
+
+
+async def _load_user(username: str) -> CurrentUser | None:
+    user = _user_cache.get(username)
+    if user is not MISSING:
+        return user
+    async with AsyncSessionLocal() as db:
+        row = await db.scalar(select(User).where(User.username == username))
+    user = CurrentUser(row.id, row.username, row.password_hash) if row else None
+    _user_cache.set(username, user)
+    return user
+
+
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials | None = Depends(security),
-) -> User:
+) -> CurrentUser:
     if not credentials:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    username = decode_access_token(credentials.credentials)
-    if not username:
+    claims = decode_access_token(credentials.credentials)
+    if not claims:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    user = db.query(User).filter(User.username == username).first()
+    username, fingerprint = claims
+    user = await _load_user(username)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    # Tokens issued before the password (hash) last changed are revoked.
+    if not hmac.compare_digest(fingerprint, password_fingerprint(user.password_hash)):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
@@ -0,0 +1,73 @@
+"""Bounded executor for password hashing.
+
+bcrypt is deliberately slow. Running it inline in request handlers lets a
+burst of logins occupy the whole Starlette threadpool; instead all hashing
+runs on a small dedicated thread pool (bcrypt releases the GIL), with a cap
+on queued work so an overload is rejected fast rather than piling up.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import settings
+
+
+class HashingBusyError(Exception):
+    """Raised when the hashing queue is full."""
+
+
+class HashingExecutor:
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_seconds_sum = 0.0
+        self.queue_seconds_max = 0.0
+        self.run_seconds_sum = 0.0
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwhash")
+        self._lock = threading.Lock()
+
+    def _timed(self, submitted: float, fn, args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                waited = started - submitted
+                self.queue_seconds_sum += waited
+                self.queue_seconds_max = max(self.queue_seconds_max, waited)
+                self.run_seconds_sum += finished - started
+                self.completed += 1
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HashingBusyError("Too many concurrent password operations")
+            self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, self._timed, time.perf_counter(), fn, args)
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "queue_seconds_sum": round(self.queue_seconds_sum, 6),
+                "queue_seconds_max": round(self.queue_seconds_max, 6),
+                "run_seconds_sum": round(self.run_seconds_sum, 6),
+            }
+
+
+hashing_executor = HashingExecutor(settings.password_hash_workers, settings.password_hash_max_pending)
@@ -1,11 +1,16 @@
 """JWT and password hashing."""
+import hashlib
+import hmac
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
 from app.config import settings
+from app.core.hashing import hashing_executor
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes made with a different cost than bcrypt_rounds report needs_update,
+# so they are rehashed on the next successful login.
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds)
 
 
 def verify_password(plain: str, hashed: str) -> bool:
@@ -16,15 +21,38 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
-def create_access_token(subject: str) -> str:
+async def verify_and_update_password(plain: str, hashed: str) -> tuple[bool, str | None]:
+    """Verify on the hashing executor; also returns a new hash when the stored one is outdated."""
+    return await hashing_executor.run(pwd_context.verify_and_update, plain, hashed)
+
+
+async def hash_password(password: str) -> str:
+    return await hashing_executor.run(pwd_context.hash, password)
+
+
+def password_fingerprint(password_hash: str) -> str:
+    """Short keyed digest of the stored hash, embedded in tokens as "pwd".
+
+    Any change of the hash (password change, cost upgrade) changes it, which
+    revokes every token issued before.
+    """
+    digest = hmac.new(settings.secret_key.encode(), password_hash.encode(), hashlib.sha256)
+    return digest.hexdigest()[:16]
+
+
+def create_access_token(subject: str, password_hash: str) -> str:
     expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
-    to_encode = {"sub": subject, "exp": expire}
+    to_encode = {"sub": subject, "pwd": password_fingerprint(password_hash), "exp": expire}
     return jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
 
 
-def decode_access_token(token: str) -> str | None:
+def decode_access_token(token: str) -> tuple[str, str] | None:
+    """(subject, password fingerprint) of a valid token, else None."""
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        return payload.get("sub")
     except JWTError:
         return None
+    subject, fingerprint = payload.get("sub"), payload.get("pwd")
+    if not subject or not fingerprint:
+        return None
+    return subject, fingerprint
@@ -1,16 +1,43 @@
-"""Database connection and session."""
+"""Database connection and session.
+
+The sync engine (psycopg2) serves the scheduler, settings and auth paths;
+the async engine (asyncpg) serves the async routers through get_async_db.
+"""
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from app.config import settings
+from app.services.pool_metrics import instrumented
+
+
+def _pool_options() -> dict:
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
 
 engine = create_engine(
     settings.database_url,
-    pool_pre_ping=True,
+    poolclass=instrumented(QueuePool),
+    **_pool_options(),
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+async_engine = create_async_engine(
+    make_url(settings.database_url).set(drivername="postgresql+asyncpg"),
+    poolclass=instrumented(AsyncAdaptedQueuePool),
+    **_pool_options(),
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 
 def get_db():
     """Dependency for FastAPI: yield a DB session."""
@@ -19,3 +46,17 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def pool_stats() -> dict:
+    """Pool gauges and checkout-wait metrics for both engines."""
+    return {
+        "sync": engine.pool.metrics.snapshot(engine.pool),
+        "async": async_engine.pool.metrics.snapshot(async_engine.pool),
+    }
+
+
+async def get_async_db():
+    """Dependency for async FastAPI handlers: yield an AsyncSession."""
+    async with AsyncSessionLocal() as db:
+        yield db
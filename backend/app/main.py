@@ -5,15 +5,18 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
-from app.routers import auth, categories, subscriptions, stats, settings as settings_router, notifications
+from app.routers import auth, categories, subscriptions, stats, settings as settings_router, notifications, system
 from app.scheduler import start_scheduler, shutdown_scheduler
+from app.services.change_feed import start_listener, stop_listener
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    start_listener()
     start_scheduler()
     yield
     shutdown_scheduler()
+    stop_listener()
 
 
 app = FastAPI(
@@ -29,6 +32,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 app.include_router(auth.router, prefix="/api")
@@ -37,6 +41,7 @@ app.include_router(subscriptions.router, prefix="/api")
 app.include_router(stats.router, prefix="/api")
 app.include_router(settings_router.router, prefix="/api")
 app.include_router(notifications.router, prefix="/api")
+app.include_router(system.router, prefix="/api")
 
 
 @app.get("/health")
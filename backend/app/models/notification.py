@@ -1,6 +1,6 @@
 """Notification (reminder log) model."""
 import uuid
-from sqlalchemy import Column, String, Boolean, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, Boolean, Date, DateTime, Text, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 
@@ -9,10 +9,17 @@ from app.database import Base
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notifications_sent_at", "sent_at"),
+        Index("ix_notifications_subscription_id", "subscription_id"),
+        UniqueConstraint("subscription_id", "notify_type", "target_date", name="uq_notifications_dedup"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     subscription_id = Column(UUID(as_uuid=True), ForeignKey("subscriptions.id", ondelete="CASCADE"), nullable=False)
     notify_type = Column(String(20), nullable=False)
+    # expire_date the reminder was about; part of the dedup key
+    target_date = Column(Date, nullable=True)
     message = Column(Text, nullable=True)
     sent_at = Column(DateTime(timezone=True), server_default=func.now())
     success = Column(Boolean, nullable=False, default=False)
@@ -1,6 +1,6 @@
 """Subscription (service) model."""
 import uuid
-from sqlalchemy import Column, String, Numeric, Date, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, Numeric, Date, DateTime, SmallInteger, Text, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -10,6 +10,11 @@ from app.database import Base
 
 class Subscription(Base):
     __tablename__ = "subscriptions"
+    __table_args__ = (
+        Index("ix_subscriptions_expire_date_id", "expire_date", "id"),
+        Index("ix_subscriptions_category_id_expire_date", "category_id", "expire_date", "id"),
+        Index("ix_subscriptions_start_date", "start_date"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(100), nullable=False)
@@ -20,6 +25,9 @@ class Subscription(Base):
     billing_cycle = Column(String(20), nullable=False, default="monthly")
     start_date = Column(Date, nullable=True)
     expire_date = Column(Date, nullable=False)
+    # Day of month that month-based renewals land on, fixed by the first
+    # renew; NULL derives it from expire_date / start_date (renewal_day).
+    renewal_day = Column(SmallInteger, nullable=True)
     status = Column(String(20), nullable=False, default="active")
     notify_days = Column(JSONB, nullable=True)
     url = Column(String(500), nullable=True)
@@ -1,50 +1,92 @@
 """Auth API."""
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi import status
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
 from app.schemas.auth import LoginRequest, TokenResponse, UserResponse, PasswordChangeRequest
-from app.core.security import verify_password, get_password_hash, create_access_token
-from app.core.deps import get_current_user
+from app.core.hashing import HashingBusyError
+from app.core.security import verify_and_update_password, hash_password, create_access_token
+from app.core.deps import CurrentUser, get_current_user, invalidate_user, notify_user_changed
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server busy, please retry",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/login", response_model=TokenResponse)
-def login(data: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == data.username).first()
-    if not user or not verify_password(data.password, user.password_hash):
+async def login(data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    row = (await db.execute(
+        select(User.id, User.username, User.password_hash).where(User.username == data.username)
+    )).first()
+    # Release the connection before queueing for bcrypt: a login burst would
+    # otherwise hold pool connections for the whole hashing wait.
+    await db.close()
+    try:
+        valid, new_hash = (await verify_and_update_password(data.password, row.password_hash)) if row else (False, None)
+    except HashingBusyError:
+        raise _busy()
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password",
         )
-    token = create_access_token(subject=user.username)
+    password_hash = row.password_hash
+    if new_hash:
+        # Stored hash used an outdated bcrypt cost; upgrade it transparently
+        # in a short transaction of its own.
+        await db.execute(update(User).where(User.id == row.id).values(password_hash=new_hash))
+        await notify_user_changed(db, row.username)
+        await db.commit()
+        invalidate_user(row.username)
+        password_hash = new_hash
+    token = create_access_token(subject=row.username, password_hash=password_hash)
     return TokenResponse(access_token=token)
 
 
 @router.get("/me", response_model=UserResponse)
-def me(current_user: User = Depends(get_current_user)):
+async def me(current_user: CurrentUser = Depends(get_current_user)):
     return current_user
 
 
 @router.post("/logout")
-def logout():
+async def logout():
     return {"message": "Logged out"}
 
 
 @router.put("/password")
-def change_password(
+async def change_password(
     data: PasswordChangeRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    if not verify_password(data.old_password, current_user.password_hash):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Old password is incorrect",
-        )
-    current_user.password_hash = get_password_hash(data.new_password)
-    db.commit()
-    return {"message": "Password updated"}
+    # current_user is a cached snapshot; check against the live row. The
+    # connection is released before the (slow, queued) bcrypt work.
+    stored_hash = await db.scalar(select(User.password_hash).where(User.id == current_user.id))
+    await db.close()
+    try:
+        valid = stored_hash is not None and (await verify_and_update_password(data.old_password, stored_hash))[0]
+        if not valid:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Old password is incorrect",
+            )
+        new_hash = await hash_password(data.new_password)
+    except HashingBusyError:
+        raise _busy()
+    await db.execute(update(User).where(User.id == current_user.id).values(password_hash=new_hash))
+    await notify_user_changed(db, current_user.username)
+    await db.commit()
+    invalidate_user(current_user.username)
+    # Tokens issued for the old password no longer validate; hand back a
+    # fresh one so this session can continue.
+    token = create_access_token(subject=current_user.username, password_hash=new_hash)
+    return {"message": "Password updated", "access_token": token, "token_type": "bearer"}
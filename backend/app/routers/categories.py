@@ -1,21 +1,20 @@
 """Categories API."""
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, func, select
 
-from app.database import get_db
-from app.models.user import User
+from app.database import get_async_db
 from app.models.category import Category
 from app.models.subscription import Subscription
 from app.schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse
-from app.core.deps import get_current_user
+from app.services.data_version import bump_data_version
+from app.core.deps import CurrentUser, get_current_user
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
 
-def _category_to_response(c: Category, db: Session) -> CategoryResponse:
-    count = db.query(func.count(Subscription.id)).filter(Subscription.category_id == c.id).scalar() or 0
+def _category_to_response(c: Category, count: int) -> CategoryResponse:
     return CategoryResponse(
         id=c.id,
         name=c.name,
@@ -26,22 +25,33 @@ def _category_to_response(c: Category, db: Session) -> CategoryResponse:
     )
 
 
+async def _categories_with_counts(db: AsyncSession, category_id: UUID | None = None):
+    """Categories with their subscription counts from one LEFT JOIN ... GROUP BY."""
+    q = (
+        select(Category, func.count(Subscription.id))
+        .outerjoin(Subscription, Subscription.category_id == Category.id)
+        .group_by(Category.id)
+    )
+    if category_id is not None:
+        q = q.where(Category.id == category_id)
+    return (await db.execute(q.order_by(Category.sort_order, Category.created_at))).all()
+
+
 @router.get("", response_model=list[CategoryResponse])
-def list_categories(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+async def list_categories(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
-    cats = db.query(Category).order_by(Category.sort_order, Category.created_at).all()
-    return [_category_to_response(c, db) for c in cats]
+    return [_category_to_response(c, count) for c, count in await _categories_with_counts(db)]
 
 
 @router.post("", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
-def create_category(
+async def create_category(
     data: CategoryCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
-    max_order = db.query(func.max(Category.sort_order)).scalar() or -1
+    max_order = await db.scalar(select(func.max(Category.sort_order))) or -1
     cat = Category(
         name=data.name,
         color=data.color,
@@ -49,19 +59,20 @@ def create_category(
         sort_order=max_order + 1,
     )
     db.add(cat)
-    db.commit()
-    db.refresh(cat)
-    return _category_to_response(cat, db)
+    await bump_data_version(db)
+    await db.commit()
+    await db.refresh(cat)
+    return _category_to_response(cat, 0)
 
 
 @router.put("/{category_id}", response_model=CategoryResponse)
-def update_category(
+async def update_category(
     category_id: UUID,
     data: CategoryUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
-    cat = db.query(Category).filter(Category.id == category_id).first()
+    cat = await db.get(Category, category_id)
     if not cat:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
     if data.name is not None:
@@ -72,19 +83,21 @@ def update_category(
         cat.icon = data.icon
     if data.sort_order is not None:
         cat.sort_order = data.sort_order
-    db.commit()
-    db.refresh(cat)
-    return _category_to_response(cat, db)
+    await bump_data_version(db)
+    await db.commit()
+    cat, count = (await _categories_with_counts(db, category_id))[0]
+    return _category_to_response(cat, count)
 
 
 @router.delete("/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_category(
+async def delete_category(
     category_id: UUID,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
-    cat = db.query(Category).filter(Category.id == category_id).first()
-    if not cat:
+    # Subscriptions are detached by the FK's ON DELETE SET NULL.
+    result = await db.execute(delete(Category).where(Category.id == category_id))
+    if not result.rowcount:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
-    db.delete(cat)
-    db.commit()
+    await bump_data_version(db)
+    await db.commit()
@@ -1,32 +1,37 @@
 """Notifications (reminder logs) API."""
 from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.database import get_db
-from app.models.user import User
 from app.models.notification import Notification
 from app.schemas.notification import NotificationResponse
-from app.core.deps import get_current_user
+from app.services.fast_json import ORJSONResponse, rows_to_dicts
+from app.core.deps import CurrentUser, get_current_user
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
 
-@router.get("", response_model=list[NotificationResponse])
+_LIST_COLUMNS = (
+    Notification.id,
+    Notification.subscription_id,
+    Notification.notify_type,
+    Notification.target_date,
+    Notification.message,
+    Notification.sent_at,
+    Notification.success,
+    Notification.error_message,
+)
+_LIST_KEYS = [c.key for c in _LIST_COLUMNS]
+
+
+@router.get("", response_model=list[NotificationResponse], response_class=ORJSONResponse)
 def list_notifications(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     limit: int = Query(50, ge=1, le=200),
 ):
-    rows = db.query(Notification).order_by(Notification.sent_at.desc()).limit(limit).all()
-    return [
-        NotificationResponse(
-            id=r.id,
-            subscription_id=r.subscription_id,
-            notify_type=r.notify_type,
-            message=r.message,
-            sent_at=r.sent_at,
-            success=r.success,
-            error_message=r.error_message,
-        )
-        for r in rows
-    ]
+    rows = db.execute(
+        select(*_LIST_COLUMNS).order_by(Notification.sent_at.desc()).limit(limit)
+    ).all()
+    return ORJSONResponse(rows_to_dicts(_LIST_KEYS, rows))
@@ -1,61 +1,78 @@
 """Settings API."""
+import json
+
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from app.database import get_db
-from app.models.user import User
 from app.schemas.setting import SettingsResponse, SettingsUpdate
-from app.services.settings_repo import get_setting, set_setting, get_setting_json, set_setting_json
+from app.scheduler import reschedule_reminder_job
+from app.services.data_version import DATA_VERSION_KEY, new_data_version
+from app.services.settings_repo import get_settings_many, set_settings_many, loads_setting
 from app.services.telegram import send_telegram_message
-from app.core.deps import get_current_user
+from app.core.deps import CurrentUser, get_current_user
 
 router = APIRouter(prefix="/settings", tags=["settings"])
 
 
+SETTING_KEYS = [
+    "telegram_bot_token",
+    "telegram_chat_id",
+    "notify_time",
+    "default_notify_days",
+    "default_currency",
+    "exchange_rate",
+    "exchange_rates",
+]
+
+
+def _settings_response() -> SettingsResponse:
+    values = get_settings_many(SETTING_KEYS)
+    return SettingsResponse(
+        telegram_bot_token=values["telegram_bot_token"],
+        telegram_chat_id=values["telegram_chat_id"],
+        notify_time=values["notify_time"] or "09:00",
+        default_notify_days=loads_setting(values["default_notify_days"]) or [7, 3, 1],
+        default_currency=values["default_currency"] or "CNY",
+        exchange_rate=float(values["exchange_rate"] or "7.2"),
+        exchange_rates=loads_setting(values["exchange_rates"]) or {},
+    )
+
+
 @router.get("", response_model=SettingsResponse)
 def get_settings(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
-    return SettingsResponse(
-        telegram_bot_token=get_setting("telegram_bot_token"),
-        telegram_chat_id=get_setting("telegram_chat_id"),
-        notify_time=get_setting("notify_time") or "09:00",
-        default_notify_days=get_setting_json("default_notify_days") or [7, 3, 1],
-        default_currency=get_setting("default_currency") or "CNY",
-        exchange_rate=float(get_setting("exchange_rate") or "7.2"),
-    )
+    return _settings_response()
 
 
 @router.put("", response_model=SettingsResponse)
 def update_settings(
     data: SettingsUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
-    if data.telegram_bot_token is not None:
-        set_setting("telegram_bot_token", data.telegram_bot_token)
-    if data.telegram_chat_id is not None:
-        set_setting("telegram_chat_id", data.telegram_chat_id)
-    if data.notify_time is not None:
-        set_setting("notify_time", data.notify_time)
-    if data.default_notify_days is not None:
-        set_setting_json("default_notify_days", data.default_notify_days)
-    if data.default_currency is not None:
-        set_setting("default_currency", data.default_currency)
-    if data.exchange_rate is not None:
-        set_setting("exchange_rate", str(data.exchange_rate))
-    return SettingsResponse(
-        telegram_bot_token=get_setting("telegram_bot_token"),
-        telegram_chat_id=get_setting("telegram_chat_id"),
-        notify_time=get_setting("notify_time") or "09:00",
-        default_notify_days=get_setting_json("default_notify_days") or [7, 3, 1],
-        default_currency=get_setting("default_currency") or "CNY",
-        exchange_rate=float(get_setting("exchange_rate") or "7.2"),
-    )
+    mapping: dict[str, str | None] = {}
+    values = data.model_dump(exclude_none=True)
+    if "exchange_rates" in values:
+        values["exchange_rates"] = {k.upper(): v for k, v in values["exchange_rates"].items()}
+    for key, value in values.items():
+        if key in ("default_notify_days", "exchange_rates"):
+            mapping[key] = json.dumps(value)
+        else:
+            mapping[key] = str(value)
+    if mapping:
+        # exchange rates / default_currency feed the stats responses.
+        mapping[DATA_VERSION_KEY] = new_data_version()
+    set_settings_many(mapping)
+    if "notify_time" in mapping:
+        # Other processes pick the change up from the settings change feed.
+        reschedule_reminder_job()
+    return _settings_response()
 
 
 @router.post("/test-telegram")
 def test_telegram(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     ok, err = send_telegram_message("SubTracker 测试消息：连接成功。")
     if ok:
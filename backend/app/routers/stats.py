@@ -1,164 +1,275 @@
-"""Stats API."""
+"""Stats API.
+
+Every endpoint is served through response_cache: responses carry a strong
+ETag derived from the parameters, today's date and the data version.
+"""
+from calendar import monthrange
+from collections import defaultdict
 from datetime import date, timedelta
 from decimal import Decimal
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
+from fastapi import APIRouter, Depends, Query, Request
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, or_, select
 
-from app.database import get_db
-from app.models.user import User
+from app.database import get_async_db
 from app.models.subscription import Subscription
-from app.schemas.stats import OverviewStats, ExpenseTrendPoint, CalendarDay
-from app.services.subscription_status import compute_status
-from app.core.deps import get_current_user
+from app.schemas.stats import OverviewStats, ExpenseTrendPoint, CalendarDay, Forecast, ForecastMonth
+from app.services.calendar_engine import calendar_days
+from app.services.cost_engine import load_rate_table, monthly_series, normalize, payment_series, quantize
+from app.services.response_cache import cached_response
+from app.services.subscription_status import STATUSES, status_expr
+from app.core.deps import CurrentUser, get_current_user
 
 router = APIRouter(prefix="/stats", tags=["stats"])
 
+# Serializers for the cached responses (same output as the response_model).
+_OVERVIEW = TypeAdapter(OverviewStats)
+_EXPIRING = TypeAdapter(list[dict])
+_CALENDAR = TypeAdapter(list[dict])
+_COSTS = TypeAdapter(list[ExpenseTrendPoint])
+_FORECAST = TypeAdapter(Forecast)
 
-@router.get("/overview", response_model=OverviewStats)
-def get_overview(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
+
+async def _overview(db: AsyncSession) -> OverviewStats:
     today = date.today()
     end_of_month = (today.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
-    subs = db.query(Subscription).all()
-    total = len(subs)
-    expiring_this_month = sum(
-        1 for s in subs
-        if today <= s.expire_date <= end_of_month
-    )
-    monthly_cny = Decimal("0")
-    monthly_usd = Decimal("0")
-    for s in subs:
-        if compute_status(s.expire_date) == "expired":
-            continue
-        mult = 1
-        if s.billing_cycle == "yearly":
-            mult = 1 / 12
-        elif s.billing_cycle == "quarterly":
-            mult = 1 / 3
-        if s.currency == "CNY":
-            monthly_cny += s.cost * mult
-        else:
-            monthly_usd += s.cost * mult
-    active = sum(1 for s in subs if compute_status(s.expire_date) == "active")
+    status = status_expr(today)
+    # One grouped scan with status computed in the database; costs are summed
+    # per (currency, cycle) and normalized by the cost engine.
+    rows = (await db.execute(select(
+        Subscription.currency,
+        Subscription.billing_cycle,
+        status,
+        func.count(Subscription.id),
+        func.count(Subscription.id).filter(
+            Subscription.expire_date >= today,
+            Subscription.expire_date <= end_of_month,
+        ),
+        func.sum(Subscription.cost),
+    ).group_by(Subscription.currency, Subscription.billing_cycle, status))).all()
+    expiring_this_month = 0
+    status_counts = dict.fromkeys(STATUSES, 0)
+    sums: dict[tuple[str, str], Decimal] = defaultdict(Decimal)
+    for currency, billing_cycle, sub_status, count, expiring, cost_sum in rows:
+        expiring_this_month += expiring
+        status_counts[sub_status] += count
+        if sub_status != "expired":
+            sums[(currency, billing_cycle)] += cost_sum or Decimal(0)
+    by_currency = normalize(sums)
+    rates = await load_rate_table()
+    monthly_total, unconverted = rates.total(by_currency)
     return OverviewStats(
-        total_services=total,
+        total_services=sum(status_counts.values()),
         expiring_this_month=expiring_this_month,
-        monthly_expense_cny=round(monthly_cny, 2),
-        monthly_expense_usd=round(monthly_usd, 2),
-        active_services=active,
+        monthly_expense_cny=quantize(by_currency.get("CNY", Decimal(0))),
+        monthly_expense_usd=quantize(by_currency.get("USD", Decimal(0))),
+        active_services=status_counts["active"],
+        monthly_expense_by_currency={c: quantize(a) for c, a in by_currency.items()},
+        currency=rates.base,
+        monthly_expense_total=quantize(monthly_total),
+        unconverted_currencies=unconverted,
+        status_counts=status_counts,
     )
 
 
-@router.get("/expiring", response_model=list)
-def get_expiring(
-    days: int = Query(7, ge=1, le=30),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+@router.get("/overview", response_model=OverviewStats)
+async def get_overview(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
+    return await cached_response(request, ("overview",), _OVERVIEW, lambda: _overview(db))
+
+
+async def _expiring(db: AsyncSession, days: int) -> list[dict]:
     today = date.today()
     target = today + timedelta(days=days)
-    subs = db.query(Subscription).filter(
+    rows = (await db.execute(select(
+        Subscription.id,
+        Subscription.name,
+        Subscription.category_id,
+        Subscription.expire_date,
+        status_expr(today),
+        Subscription.cost,
+        Subscription.currency,
+    ).where(
         Subscription.expire_date >= today,
         Subscription.expire_date <= target,
-    ).order_by(Subscription.expire_date).all()
+    ).order_by(Subscription.expire_date))).all()
     return [
         {
-            "id": str(s.id),
-            "name": s.name,
-            "category_id": str(s.category_id) if s.category_id else None,
-            "expire_date": s.expire_date.isoformat(),
-            "status": compute_status(s.expire_date),
-            "cost": float(s.cost),
-            "currency": s.currency,
+            "id": str(sub_id),
+            "name": name,
+            "category_id": str(category_id) if category_id else None,
+            "expire_date": expire_date.isoformat(),
+            "status": sub_status,
+            "cost": float(cost),
+            "currency": currency,
         }
-        for s in subs
+        for sub_id, name, category_id, expire_date, sub_status, cost, currency in rows
     ]
 
 
+@router.get("/expiring", response_model=list)
+async def get_expiring(
+    request: Request,
+    days: int = Query(7, ge=1, le=30),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    return await cached_response(request, ("expiring", days), _EXPIRING, lambda: _expiring(db, days))
+
+
 @router.get("/calendar", response_model=list[CalendarDay])
-def get_calendar(
+async def get_calendar(
+    request: Request,
     year: int = Query(...),
     month: int = Query(..., ge=1, le=12),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    months: int = Query(1, ge=1, le=12),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
-    from calendar import monthrange
-    _, last = monthrange(year, month)
-    start = date(year, month, 1)
-    end = date(year, month, last)
-    subs = db.query(Subscription).filter(
-        Subscription.expire_date >= start,
-        Subscription.expire_date <= end,
-    ).all()
-    by_date: dict[str, list] = {}
-    today = date.today()
-    for s in subs:
-        d = s.expire_date.isoformat()
-        if d not in by_date:
-            by_date[d] = []
-        delta = (s.expire_date - today).days
-        by_date[d].append({
-            "id": str(s.id),
-            "name": s.name,
-            "color": "#4382FF",
-            "days_left": delta,
-        })
-    result = []
-    for d in range(1, last + 1):
-        dt = date(year, month, d)
-        key = dt.isoformat()
-        items = by_date.get(key, [])
-        result.append(CalendarDay(
-            date=key,
-            service_ids=[x["id"] for x in items],
-            service_names=[x["name"] for x in items],
-            category_colors=[x["color"] for x in items],
-            days_left=[x["days_left"] for x in items],
-        ))
-    return result
+    """Days of `months` consecutive months from year/month, with projected renewals."""
+    return await cached_response(
+        request, ("calendar", year, month, months), _CALENDAR, lambda: calendar_days(db, year, month, months)
+    )
 
 
-@router.get("/costs", response_model=list[ExpenseTrendPoint])
-def get_costs(
-    months: int = Query(6, ge=1, le=24),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
+async def _costs(db: AsyncSession, months: int) -> list[ExpenseTrendPoint]:
     today = date.today()
-    result = []
+    month_starts: list[date] = []
+    month_ends: list[date] = []
     for i in range(months - 1, -1, -1):
         m = today.month - 1 - i
         y = today.year
         while m < 0:
             m += 12
             y -= 1
-        month_start = date(y, m + 1, 1)
+        month_starts.append(date(y, m + 1, 1))
         if m == 11:
-            month_end = date(y, 12, 31)
+            month_ends.append(date(y, 12, 31))
         else:
-            month_end = date(y, m + 2, 1) - timedelta(days=1)
-        subs = db.query(Subscription).filter(
-            Subscription.expire_date >= month_start,
-            or_(Subscription.start_date.is_(None), Subscription.start_date <= month_end),
-        ).all()
-        cny = Decimal("0")
-        usd = Decimal("0")
-        for s in subs:
-            mult = 1
-            if s.billing_cycle == "yearly":
-                mult = 1 / 12
-            elif s.billing_cycle == "quarterly":
-                mult = 1 / 3
-            if s.currency == "CNY":
-                cny += s.cost * mult
-            else:
-                usd += s.cost * mult
+            month_ends.append(date(y, m + 2, 1) - timedelta(days=1))
+    rows = (await db.execute(select(
+        Subscription.cost,
+        Subscription.currency,
+        Subscription.billing_cycle,
+        Subscription.start_date,
+        Subscription.expire_date,
+    ).where(
+        Subscription.expire_date >= month_starts[0],
+        or_(Subscription.start_date.is_(None), Subscription.start_date <= month_ends[-1]),
+    ))).all()
+    costs, currencies, cycles, starts, expires = zip(*rows) if rows else ((),) * 5
+    series = monthly_series(costs, currencies, cycles, starts, expires, month_starts, month_ends)
+    rates = await load_rate_table()
+    zero = [Decimal(0)] * months
+    result = []
+    for i, month_start in enumerate(month_starts):
+        by_currency = {c: amounts[i] for c, amounts in series.items()}
+        month_total, _ = rates.total(by_currency)
         result.append(ExpenseTrendPoint(
             month=f"{month_start.month}月",
-            cny=round(cny, 2),
-            usd=round(usd, 2),
+            cny=quantize(series.get("CNY", zero)[i]),
+            usd=quantize(series.get("USD", zero)[i]),
+            by_currency={c: quantize(a) for c, a in by_currency.items()},
+            currency=rates.base,
+            total=quantize(month_total),
         ))
     return result
+
+
+@router.get("/costs", response_model=list[ExpenseTrendPoint])
+async def get_costs(
+    request: Request,
+    months: int = Query(6, ge=1, le=24),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    return await cached_response(request, ("costs", months), _COSTS, lambda: _costs(db, months))
+
+
+async def _forecast(db: AsyncSession, months: int) -> Forecast:
+    today = date.today()
+    year, month0 = divmod(today.year * 12 + today.month - 1 + months - 1, 12)
+    end = date(year, month0 + 1, monthrange(year, month0 + 1)[1])
+    # Subscriptions sharing (currency, category, cycle, expire_date) pay on the
+    # same days, so the database collapses them in its single scan and each
+    # group's renewals are expanded once; groups are streamed in partitions.
+    result = await db.stream(
+        select(
+            func.sum(Subscription.cost),
+            func.count(Subscription.id),
+            Subscription.currency,
+            Subscription.category_id,
+            Subscription.billing_cycle,
+            Subscription.expire_date,
+        )
+        .where(Subscription.expire_date >= today, Subscription.expire_date <= end)
+        .group_by(
+            Subscription.currency,
+            Subscription.category_id,
+            Subscription.billing_cycle,
+            Subscription.expire_date,
+        )
+        .execution_options(yield_per=1000)
+    )
+    amounts: dict[tuple[str, object], list[Decimal]] = {}
+    payments = [0] * months
+    async for partition in result.partitions():
+        part_amounts, part_payments = payment_series(*zip(*partition), today, months)
+        for key, series in part_amounts.items():
+            total = amounts.get(key)
+            if total is None:
+                amounts[key] = series
+            else:
+                amounts[key] = [a + b for a, b in zip(total, series)]
+        payments = [a + b for a, b in zip(payments, part_payments)]
+    rates = await load_rate_table()
+    unconverted: set[str] = set()
+    result_months = []
+    grand_total = Decimal(0)
+    for i in range(months):
+        y, m0 = divmod(today.year * 12 + today.month - 1 + i, 12)
+        by_currency: dict[str, Decimal] = defaultdict(Decimal)
+        by_category: dict[str, Decimal] = defaultdict(Decimal)
+        for (currency, category_id), series in amounts.items():
+            if not series[i]:
+                continue
+            by_currency[currency] += series[i]
+            converted = rates.convert(series[i], currency)
+            if converted is None:
+                unconverted.add(currency)
+            else:
+                by_category[str(category_id) if category_id else "uncategorized"] += converted
+        month_total = sum(by_category.values(), Decimal(0))
+        grand_total += month_total
+        result_months.append(ForecastMonth(
+            month=f"{y}-{m0 + 1:02d}",
+            payments=payments[i],
+            by_currency={c: quantize(a) for c, a in by_currency.items()},
+            by_category={c: quantize(a) for c, a in by_category.items()},
+            total=quantize(month_total),
+        ))
+    return Forecast(
+        currency=rates.base,
+        total=quantize(grand_total),
+        unconverted_currencies=sorted(unconverted),
+        months=result_months,
+    )
+
+
+@router.get("/forecast", response_model=Forecast)
+async def get_forecast(
+    request: Request,
+    months: int = Query(12, ge=1, le=36),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """Projected renewal payments per month from this month on, per currency and category.
+
+    A subscription pays its cost on expire_date and on every renewal after it
+    (renewal engine); already expired subscriptions are treated as lapsed.
+    """
+    return await cached_response(request, ("forecast", months), _FORECAST, lambda: _forecast(db, months))
@@ -1,15 +1,32 @@
 """Subscriptions (services) API."""
+import base64
 from uuid import UUID
 from datetime import date
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, File, HTTPException, status, Query, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy import case, delete, or_, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
-from app.models.user import User
+from app.database import get_async_db
+from app.models.category import Category
 from app.models.subscription import Subscription
-from app.schemas.subscription import SubscriptionCreate, SubscriptionUpdate, SubscriptionResponse
-from app.services.subscription_status import compute_status
-from app.core.deps import get_current_user
+from app.schemas.subscription import (
+    BulkOperation,
+    BulkOperationResult,
+    BulkRequest,
+    BulkResult,
+    ImportResult,
+    SubscriptionCreate,
+    SubscriptionResponse,
+    SubscriptionUpdate,
+)
+from app.services.fast_json import ORJSONResponse, rows_to_dicts
+from app.services.renewal import next_renewal, next_renewal_expr, parse_cycle, renewal_day, renewal_day_expr
+from app.services.subscription_io import FORMATS, ImportFailed, export_subscriptions, import_subscriptions
+from app.services.subscription_status import compute_status, status_expire_range, status_expr
+from app.services.data_version import bump_data_version
+from app.core.deps import CurrentUser, get_current_user
 
 router = APIRouter(prefix="/subscriptions", tags=["subscriptions"])
 
@@ -32,40 +49,223 @@ def _sub_to_response(s: Subscription) -> SubscriptionResponse:
     )
 
 
-@router.get("", response_model=list[SubscriptionResponse])
-def list_subscriptions(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+# Columns for the list endpoint, which serializes rows without building models.
+_LIST_COLUMNS = (
+    Subscription.id,
+    Subscription.name,
+    Subscription.category_id,
+    Subscription.provider,
+    Subscription.cost,
+    Subscription.currency,
+    Subscription.billing_cycle,
+    Subscription.start_date,
+    Subscription.expire_date,
+    Subscription.notes,
+    Subscription.url,
+    Subscription.notify_days,
+)
+_LIST_KEYS = [c.key for c in _LIST_COLUMNS] + ["status"]
+
+
+def _rows_to_items(rows) -> list[dict]:
+    items = rows_to_dicts(_LIST_KEYS, rows)
+    for item in items:
+        if item["notify_days"] is None:
+            item["notify_days"] = [7, 3, 1]
+    return items
+
+
+def _encode_cursor(s) -> str:
+    raw = f"{s.expire_date.isoformat()}|{s.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[date, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        expire_date, sub_id = raw.split("|", 1)
+        return date.fromisoformat(expire_date), UUID(sub_id)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+@router.get("", response_model=list[SubscriptionResponse], response_class=ORJSONResponse)
+async def list_subscriptions(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
     category_id: UUID | None = Query(None),
     status_filter: str | None = Query(None, alias="status"),
+    limit: int | None = Query(None, ge=1, le=500),
+    cursor: str | None = Query(None),
 ):
-    q = db.query(Subscription)
+    """List subscriptions ordered by (expire_date, id).
+
+    With ``limit`` set, the response is one page and ``X-Next-Cursor`` carries
+    the cursor for the following page when more rows exist.
+    """
+    # Status is computed by the database (status_expr) rather than per row here.
+    q = select(*_LIST_COLUMNS, status_expr().label("status"))
     if category_id is not None:
-        q = q.filter(Subscription.category_id == category_id)
-    subs = q.order_by(Subscription.expire_date).all()
-    result = [_sub_to_response(s) for s in subs]
+        q = q.where(Subscription.category_id == category_id)
     if status_filter:
-        result = [r for r in result if r.status == status_filter]
-    return result
+        # Same rows as status_expr() == status_filter, as an indexable range.
+        bounds = status_expire_range(status_filter)
+        if bounds is None:
+            return ORJSONResponse([])
+        lower, upper = bounds
+        if lower is not None:
+            q = q.where(Subscription.expire_date >= lower)
+        if upper is not None:
+            q = q.where(Subscription.expire_date <= upper)
+    if cursor:
+        q = q.where(tuple_(Subscription.expire_date, Subscription.id) > _decode_cursor(cursor))
+    q = q.order_by(Subscription.expire_date, Subscription.id)
+    if limit is None:
+        return ORJSONResponse(_rows_to_items((await db.execute(q)).all()))
+    rows = (await db.execute(q.limit(limit + 1))).all()
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = _encode_cursor(rows[-1])
+    return ORJSONResponse(_rows_to_items(rows), headers=headers)
+
+
+def _io_format(fmt: str | None, filename: str | None = None) -> str:
+    if fmt is None and filename:
+        fmt = filename.rsplit(".", 1)[-1].lower()
+        fmt = "jsonl" if fmt in ("jsonl", "ndjson") else fmt
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Format must be csv or jsonl")
+    return fmt
+
+
+@router.post("/import", response_model=ImportResult)
+async def import_subscriptions_file(
+    file: UploadFile = File(...),
+    fmt: str | None = Query(None, alias="format"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """Import a CSV (header row) or JSON Lines file of SubscriptionCreate records.
+
+    All-or-nothing: any invalid record fails the whole import with a 422
+    listing the offending lines.
+    """
+    fmt = _io_format(fmt, file.filename)
+    try:
+        imported = await import_subscriptions(db, file.file, fmt)
+    except ImportFailed as e:
+        await db.rollback()
+        raise HTTPException(status_code=422, detail=e.errors)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unknown category_id in import")
+    if imported:
+        await bump_data_version(db)
+    await db.commit()
+    return ImportResult(imported=imported)
+
+
+@router.get("/export")
+async def export_subscriptions_file(
+    fmt: str = Query("csv", alias="format"),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """Stream all subscriptions as CSV or JSON Lines."""
+    fmt = _io_format(fmt)
+    filename = f"subscriptions-{date.today():%Y%m%d}.{fmt}"
+    media_type = "text/csv; charset=utf-8" if fmt == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        export_subscriptions(fmt),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+async def _apply_bulk(db: AsyncSession, op: BulkOperation, today: date) -> BulkOperationResult:
+    """Run one bulk operation as a single set-based statement."""
+    ids = list(dict.fromkeys(op.ids))
+    if op.action == "delete":
+        stmt = delete(Subscription)
+    elif op.action == "renew":
+        cycles = (await db.scalars(
+            select(Subscription.billing_cycle).where(Subscription.id.in_(ids)).distinct()
+        )).all()
+        day = renewal_day_expr()
+        new_expire = next_renewal_expr(cycles, day)
+        # Pin the renewal day for month-based cycles, as renew does.
+        day_cycles = [c for c in cycles if parse_cycle(c).days]
+        stmt = update(Subscription).values(
+            expire_date=new_expire,
+            renewal_day=case((Subscription.billing_cycle.in_(day_cycles), None), else_=day) if day_cycles else day,
+            status=status_expr(today, new_expire),
+        )
+    elif op.action == "set_category":
+        if op.category_id is not None and await db.get(Category, op.category_id) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
+        stmt = update(Subscription).values(category_id=op.category_id)
+    else:
+        changes = op.changes.model_dump(exclude_unset=True) if op.changes else {}
+        if not changes:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="update requires changes")
+        if changes.get("category_id") is not None and await db.get(Category, changes["category_id"]) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
+        if changes.get("expire_date") is not None:
+            changes["status"] = compute_status(changes["expire_date"], today)
+        series = [getattr(Subscription, k) != changes[k] for k in ("expire_date", "billing_cycle") if changes.get(k)]
+        if series:
+            # Rows whose date or cycle actually changes start a new series.
+            changes["renewal_day"] = case((or_(*series), None), else_=Subscription.renewal_day)
+        stmt = update(Subscription).values(**changes)
+    stmt = (
+        stmt.where(Subscription.id.in_(ids))
+        .returning(Subscription.id)
+        .execution_options(synchronize_session=False)
+    )
+    touched = set((await db.scalars(stmt)).all())
+    return BulkOperationResult(
+        action=op.action,
+        requested=len(ids),
+        affected=len(touched),
+        not_found=[i for i in ids if i not in touched],
+    )
+
+
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_subscriptions(
+    data: BulkRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """Apply renew / delete / set_category / update to many subscriptions at once.
+
+    Operations run in order, one statement each, in a single transaction.
+    """
+    today = date.today()
+    results = [await _apply_bulk(db, op, today) for op in data.operations]
+    if any(r.affected for r in results):
+        await bump_data_version(db)
+    await db.commit()
+    return BulkResult(results=results)
 
 
 @router.get("/{subscription_id}", response_model=SubscriptionResponse)
-def get_subscription(
+async def get_subscription(
     subscription_id: UUID,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
-    s = db.query(Subscription).filter(Subscription.id == subscription_id).first()
+    s = await db.get(Subscription, subscription_id)
     if not s:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Subscription not found")
     return _sub_to_response(s)
 
 
 @router.post("", response_model=SubscriptionResponse, status_code=status.HTTP_201_CREATED)
-def create_subscription(
+async def create_subscription(
     data: SubscriptionCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     s = Subscription(
         name=data.name,
@@ -82,64 +282,70 @@ def create_subscription(
         notify_days=data.notify_days,
     )
     db.add(s)
-    db.commit()
-    db.refresh(s)
+    await bump_data_version(db)
+    await db.commit()
+    await db.refresh(s)
     return _sub_to_response(s)
 
 
 @router.put("/{subscription_id}", response_model=SubscriptionResponse)
-def update_subscription(
+async def update_subscription(
     subscription_id: UUID,
     data: SubscriptionUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
-    s = db.query(Subscription).filter(Subscription.id == subscription_id).first()
+    s = await db.get(Subscription, subscription_id)
     if not s:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Subscription not found")
-    for k, v in data.model_dump(exclude_unset=True).items():
+    changes = data.model_dump(exclude_unset=True)
+    # A different date or cycle starts a new series: derive the day again.
+    new_series = (
+        changes.get("expire_date", s.expire_date) != s.expire_date
+        or changes.get("billing_cycle", s.billing_cycle) != s.billing_cycle
+    )
+    for k, v in changes.items():
         setattr(s, k, v)
+    if new_series:
+        s.renewal_day = None
     if data.expire_date is not None:
         s.status = compute_status(data.expire_date)
-    elif "expire_date" not in data.model_dump(exclude_unset=True):
+    elif "expire_date" not in changes:
         s.status = compute_status(s.expire_date)
-    db.commit()
-    db.refresh(s)
+    await bump_data_version(db)
+    await db.commit()
+    await db.refresh(s)
     return _sub_to_response(s)
 
 
 @router.delete("/{subscription_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_subscription(
+async def delete_subscription(
     subscription_id: UUID,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
-    s = db.query(Subscription).filter(Subscription.id == subscription_id).first()
-    if not s:
+    result = await db.execute(delete(Subscription).where(Subscription.id == subscription_id))
+    if not result.rowcount:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Subscription not found")
-    db.delete(s)
-    db.commit()
+    await bump_data_version(db)
+    await db.commit()
 
 
 @router.post("/{subscription_id}/renew", response_model=SubscriptionResponse)
-def renew_subscription(
+async def renew_subscription(
     subscription_id: UUID,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
-    s = db.query(Subscription).filter(Subscription.id == subscription_id).first()
+    s = await db.get(Subscription, subscription_id)
     if not s:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Subscription not found")
-    from datetime import timedelta
-    if s.billing_cycle == "monthly":
-        s.expire_date = s.expire_date + timedelta(days=30)
-    elif s.billing_cycle == "quarterly":
-        s.expire_date = s.expire_date + timedelta(days=90)
-    elif s.billing_cycle == "yearly":
-        s.expire_date = date(s.expire_date.year + 1, s.expire_date.month, s.expire_date.day)
-    else:
-        s.expire_date = s.expire_date + timedelta(days=30)
+    day = renewal_day(s.expire_date, s.start_date, s.renewal_day)
+    s.expire_date = next_renewal(s.expire_date, s.billing_cycle, day)
+    # Keep the day so a clamped date (Jan 31 -> Feb 28) returns to it.
+    s.renewal_day = day if parse_cycle(s.billing_cycle).months else None
     s.status = compute_status(s.expire_date)
-    db.commit()
-    db.refresh(s)
+    await bump_data_version(db)
+    await db.commit()
+    await db.refresh(s)
     return _sub_to_response(s)
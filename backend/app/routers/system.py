@@ -0,0 +1,48 @@
+"""System diagnostics API."""
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.core.hashing import hashing_executor
+from app.database import get_db, pool_stats
+from app.scheduler import scheduler_status
+from app.schemas.system import CacheStats, HashingStats, PoolStats, SchedulerStatus
+from app.services.calendar_engine import calendar_cache_stats
+from app.services.response_cache import response_cache_stats
+from app.services.settings_repo import settings_cache_stats
+from app.core.deps import CurrentUser, get_current_user, user_cache_stats
+
+router = APIRouter(prefix="/system", tags=["system"])
+
+
+@router.get("/caches", response_model=dict[str, CacheStats])
+def get_caches(
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    return {
+        "settings": settings_cache_stats(),
+        "users": user_cache_stats(),
+        "calendar": calendar_cache_stats(),
+        "stats": response_cache_stats(),
+    }
+
+
+@router.get("/scheduler", response_model=SchedulerStatus)
+def get_scheduler_status(
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    return scheduler_status(db)
+
+
+@router.get("/pool", response_model=dict[str, PoolStats])
+def get_pool(
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    return pool_stats()
+
+
+@router.get("/hashing", response_model=HashingStats)
+def get_hashing(
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    return hashing_executor.stats()
@@ -1,39 +1,147 @@
-"""APScheduler: daily check for expiring subscriptions and send Telegram reminders."""
-from datetime import date, datetime, timedelta
+"""APScheduler: daily check for expiring subscriptions and send Telegram reminders.
+
+Every process joins a leader election; only the leader runs APScheduler, with
+jobs kept in the database so runs missed while no leader was up are caught
+up (within scheduler_misfire_grace_seconds) after a restart or failover.
+"""
+import logging
+import time
+import uuid
+from datetime import date, datetime, timezone
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from sqlalchemy import and_, func, or_, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.orm import Session
 
-from app.database import SessionLocal
+from app.config import settings
+from app.database import SessionLocal, engine
 from app.models.subscription import Subscription
 from app.models.notification import Notification
-from app.services.settings_repo import get_setting, get_setting_json
-from app.services.telegram import send_telegram_message
+from app.services import change_feed
+from app.services.leader import LeaderElection
+from app.services.settings_repo import SETTINGS_CHANNEL, get_setting, get_setting_json, set_setting_json
+from app.services.subscription_status import status_expr
+from app.services.telegram import PER_CHAT_INTERVAL, send_telegram_batch
 
+logger = logging.getLogger(__name__)
 
-def _run_reminder_job():
+# error_message of a claimed reminder whose delivery has not finished yet.
+PENDING = "pending"
+# Setting key holding the last reminder run, visible to every process.
+LAST_RUN_KEY = "scheduler_last_run"
+
+
+def _reminder_candidates(db: Session, today: date, default_days: list[int]):
+    """(id, name, expire_date, days_left) rows due for a reminder today, in one query.
+
+    A row's own notify_days array wins; rows without one (SQL NULL or JSON
+    null) fall back to default_days.
+    """
+    days_left = (Subscription.expire_date - today).label("days_left")
+    uses_default = or_(
+        Subscription.notify_days.is_(None),
+        func.jsonb_typeof(Subscription.notify_days) != "array",
+    )
+    return (
+        db.query(Subscription.id, Subscription.name, Subscription.expire_date, days_left)
+        .filter(
+            Subscription.expire_date >= today,
+            or_(
+                and_(uses_default, days_left.in_(default_days)),
+                Subscription.notify_days.contains(func.to_jsonb(days_left)),
+            ),
+        )
+        .order_by(Subscription.expire_date, Subscription.id)
+        .all()
+    )
+
+
+def _claim_reminders(db: Session, messages: dict[tuple, str]) -> list[tuple]:
+    """Insert the reminder log rows before sending; returns (notification_id, key) for rows won.
+
+    The unique (subscription_id, notify_type, target_date) key makes this safe
+    across concurrent runs: a reminder already delivered or in flight is
+    skipped, one whose previous delivery failed is claimed again. A claim is
+    a lease: a row still pending after reminder_claim_lease_seconds (its
+    run died mid-delivery) is claimed again too.
+    """
+    if not messages:
+        return []
+    lease = func.make_interval(0, 0, 0, 0, 0, 0, settings.reminder_claim_lease_seconds)
+    stmt = insert(Notification).values([
+        {
+            "id": uuid.uuid4(),
+            "subscription_id": sub_id,
+            "notify_type": notify_type,
+            "target_date": target_date,
+            "message": msg,
+            "success": False,
+            "error_message": PENDING,
+        }
+        for (sub_id, notify_type, target_date), msg in messages.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_notifications_dedup",
+        set_={"error_message": PENDING, "sent_at": func.now()},
+        where=and_(
+            Notification.success.is_(False),
+            or_(
+                Notification.error_message != PENDING,
+                Notification.sent_at < func.now() - lease,
+            ),
+        ),
+    ).returning(Notification.id, Notification.subscription_id, Notification.notify_type, Notification.target_date)
+    return [(n_id, (sub_id, notify_type, target_date)) for n_id, sub_id, notify_type, target_date in db.execute(stmt)]
+
+
+def _claim_chunk_size() -> int:
+    """Reminders claimed at a time.
+
+    Every reminder goes to the one configured chat, paced at one message per
+    PER_CHAT_INTERVAL; pacing a chunk fills at most half the lease, which
+    leaves the other half for retries and 429 pauses.
+    """
+    return max(1, int(settings.reminder_claim_lease_seconds / PER_CHAT_INTERVAL) // 2)
+
+
+def _send_reminders() -> dict | None:
+    """Claim and deliver today's reminders; None when Telegram is not configured."""
     db = SessionLocal()
     try:
         token = get_setting("telegram_bot_token")
         chat_id = get_setting("telegram_chat_id")
         if not token or not chat_id:
-            return
+            return None
         notify_days_default = get_setting_json("default_notify_days") or [7, 3, 1]
         today = date.today()
-        for days in notify_days_default:
-            target = today + timedelta(days=days)
-            subs = db.query(Subscription).filter(Subscription.expire_date == target).all()
-            for s in subs:
-                msg = f"【SubTracker 到期提醒】\n服务：{s.name}\n到期日：{s.expire_date}\n剩余 {days} 天，请及时续费。"
-                ok, err = send_telegram_message(msg, bot_token=token, chat_id=chat_id)
-                n = Notification(
-                    subscription_id=s.id,
-                    notify_type=f"{days}d",
-                    message=msg,
-                    success=ok,
-                    error_message=None if ok else err,
-                )
-                db.add(n)
-        db.commit()
+        messages = {}
+        for sub_id, name, expire_date, days in _reminder_candidates(db, today, notify_days_default):
+            msg = f"【SubTracker 到期提醒】\n服务：{name}\n到期日：{expire_date}\n剩余 {days} 天，请及时续费。"
+            messages[(sub_id, f"{days}d", expire_date)] = msg
+        # Claim and deliver in chunks: a claim's lease starts when it is
+        # taken, and one chunk must be delivered well within it.
+        items = list(messages.items())
+        size = _claim_chunk_size()
+        sent = failed = 0
+        for i in range(0, len(items), size):
+            chunk = dict(items[i:i + size])
+            claimed = _claim_reminders(db, chunk)
+            db.commit()
+            if not claimed:
+                continue
+            results = send_telegram_batch([(chat_id, chunk[key]) for _, key in claimed], bot_token=token)
+            db.execute(update(Notification), [
+                {"id": n_id, "success": ok, "error_message": None if ok else err}
+                for (n_id, _), (ok, err) in zip(claimed, results)
+            ])
+            db.commit()
+            ok_count = sum(1 for ok, _ in results if ok)
+            sent += ok_count
+            failed += len(results) - ok_count
+        return {"sent": sent, "failed": failed}
     except Exception as e:
         db.rollback()
         raise
@@ -41,22 +149,165 @@ def _run_reminder_job():
         db.close()
 
 
+def _refresh_statuses() -> int:
+    """Rewrite the stored Subscription.status for the new day in one UPDATE.
+
+    Only rows whose status actually changed are touched; returns that count.
+    """
+    db = SessionLocal()
+    try:
+        expr = status_expr(date.today())
+        result = db.execute(
+            update(Subscription)
+            .where(Subscription.status.is_distinct_from(expr))
+            # Keep updated_at: this is bookkeeping, not an edit.
+            .values(status=expr, updated_at=Subscription.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _run_reminder_job():
+    """Scheduled entry point; records the outcome under LAST_RUN_KEY for every process."""
+    started_at = datetime.now(timezone.utc)
+    t0 = time.perf_counter()
+    run = {"started_at": started_at.isoformat(), "outcome": "success", "sent": 0, "failed": 0, "error": None}
+    try:
+        counts = _send_reminders()
+        if counts is None:
+            run["outcome"] = "skipped"
+        else:
+            run.update(counts)
+    except Exception as e:
+        run["outcome"] = "error"
+        run["error"] = str(e)
+        raise
+    finally:
+        run["duration_seconds"] = round(time.perf_counter() - t0, 3)
+        set_setting_json(LAST_RUN_KEY, run)
+
+
+REMINDER_JOB_ID = "reminder"
+STATUS_JOB_ID = "status_refresh"
+
 _scheduler: BackgroundScheduler | None = None
+_election: LeaderElection | None = None
 
 
-def start_scheduler():
-    global _scheduler
-    _scheduler = BackgroundScheduler()
+def _reminder_trigger() -> CronTrigger:
     notify_time = get_setting("notify_time") or "09:00"
     parts = notify_time.strip().split(":")
-    hour = int(parts[0]) if parts else 9
-    minute = int(parts[1]) if len(parts) > 1 else 0
-    _scheduler.add_job(_run_reminder_job, CronTrigger(hour=hour, minute=minute))
-    _scheduler.start()
+    try:
+        hour = int(parts[0]) if parts else 9
+        minute = int(parts[1]) if len(parts) > 1 else 0
+        return CronTrigger(hour=hour, minute=minute)
+    except ValueError:
+        # Stored before notify_time was validated; failing here would make
+        # the leader step down and re-elect on every heartbeat.
+        logger.warning("invalid notify_time %r; using 09:00", notify_time)
+        return CronTrigger(hour=9, minute=0)
 
 
-def shutdown_scheduler():
+def _start_jobs():
+    """Run on the elected leader: start APScheduler on the persistent job store."""
+    global _scheduler
+    _scheduler = BackgroundScheduler(
+        jobstores={"default": SQLAlchemyJobStore(engine=engine)},
+        job_defaults={
+            "coalesce": True,
+            "misfire_grace_time": settings.scheduler_misfire_grace_seconds,
+        },
+    )
+    # Start paused so the stored job (and its next_run_time) is loaded before
+    # deciding whether to add it; replacing it would drop a missed run.
+    _scheduler.start(paused=True)
+    trigger = _reminder_trigger()
+    job = _scheduler.get_job(REMINDER_JOB_ID)
+    if job is None:
+        _scheduler.add_job(_run_reminder_job, trigger, id=REMINDER_JOB_ID)
+    elif str(job.trigger) != str(trigger):
+        job.reschedule(trigger)
+    if _scheduler.get_job(STATUS_JOB_ID) is None:
+        # Just after midnight, when compute_status results roll over.
+        _scheduler.add_job(_refresh_statuses, CronTrigger(hour=0, minute=1), id=STATUS_JOB_ID)
+    _scheduler.resume()
+
+
+def _stop_jobs():
     global _scheduler
     if _scheduler:
         _scheduler.shutdown(wait=False)
         _scheduler = None
+
+
+def reschedule_reminder_job():
+    """Apply the current notify_time to the running job (no-op off the leader)."""
+    scheduler = _scheduler
+    if scheduler is not None:
+        scheduler.reschedule_job(REMINDER_JOB_ID, trigger=_reminder_trigger())
+
+
+def _on_settings_changed(payload: str):
+    if payload == change_feed.RESYNC or "notify_time" in payload.split(","):
+        reschedule_reminder_job()
+
+
+change_feed.subscribe(SETTINGS_CHANNEL, _on_settings_changed)
+
+
+def is_scheduler_leader() -> bool:
+    return _election is not None and _election.is_leader
+
+
+def scheduler_status(db: Session) -> dict:
+    """Next run time of the reminder job plus the last recorded run."""
+    next_run = None
+    scheduler = _scheduler
+    if scheduler is not None:
+        job = scheduler.get_job(REMINDER_JOB_ID)
+        next_run = job.next_run_time if job else None
+    else:
+        # Not the leader: read the persisted job row the leader maintains.
+        try:
+            ts = db.execute(
+                text("SELECT next_run_time FROM apscheduler_jobs WHERE id = :id"),
+                {"id": REMINDER_JOB_ID},
+            ).scalar()
+        except ProgrammingError:
+            # No leader has created the job store yet.
+            db.rollback()
+            ts = None
+        if ts is not None:
+            next_run = datetime.fromtimestamp(ts, timezone.utc)
+    return {
+        "is_leader": is_scheduler_leader(),
+        "notify_time": get_setting("notify_time") or "09:00",
+        "next_run_time": next_run,
+        "last_run": get_setting_json(LAST_RUN_KEY),
+    }
+
+
+def start_scheduler():
+    """Join leader election; only the leader process runs the jobs."""
+    global _election
+    _election = LeaderElection(
+        settings.scheduler_lock_id,
+        on_elected=_start_jobs,
+        on_demoted=_stop_jobs,
+        interval=settings.scheduler_heartbeat_seconds,
+    )
+    _election.start()
+
+
+def shutdown_scheduler():
+    global _election
+    if _election:
+        _election.stop()
+        _election = None
+    _stop_jobs()
@@ -1,5 +1,5 @@
 """Notification (reminder log) schemas."""
-from datetime import datetime
+from datetime import date, datetime
 from uuid import UUID
 from pydantic import BaseModel
 
@@ -8,6 +8,7 @@ class NotificationResponse(BaseModel):
     id: UUID
     subscription_id: UUID
     notify_type: str
+    target_date: date | None = None
     message: str | None
     sent_at: datetime
     success: bool
@@ -1,5 +1,9 @@
 """Settings schemas."""
-from pydantic import BaseModel
+import re
+
+from pydantic import BaseModel, field_validator
+
+_NOTIFY_TIME = re.compile(r"^(\d{1,2}):(\d{2})$")
 
 
 class SettingsResponse(BaseModel):
@@ -9,6 +13,8 @@ class SettingsResponse(BaseModel):
     default_notify_days: list[int] = [7, 3, 1]
     default_currency: str = "CNY"
     exchange_rate: float = 7.2
+    # Extra rates as CNY per unit, e.g. {"EUR": 7.8}; USD uses exchange_rate.
+    exchange_rates: dict[str, float] = {}
 
 
 class SettingsUpdate(BaseModel):
@@ -18,3 +24,15 @@ class SettingsUpdate(BaseModel):
     default_notify_days: list[int] | None = None
     default_currency: str | None = None
     exchange_rate: float | None = None
+    exchange_rates: dict[str, float] | None = None
+
+    @field_validator("notify_time")
+    @classmethod
+    def _check_notify_time(cls, v: str | None) -> str | None:
+        """HH:MM between 00:00 and 23:59, normalized to two-digit hours."""
+        if v is None:
+            return v
+        match = _NOTIFY_TIME.match(v.strip())
+        if not match or int(match.group(1)) > 23 or int(match.group(2)) > 59:
+            raise ValueError("notify_time must be HH:MM (00:00-23:59)")
+        return f"{int(match.group(1)):02d}:{match.group(2)}"
@@ -9,12 +9,22 @@ class OverviewStats(BaseModel):
     monthly_expense_cny: Decimal
     monthly_expense_usd: Decimal
     active_services: int
+    monthly_expense_by_currency: dict[str, Decimal] = {}
+    # Sum of all currencies converted to `currency` (the default_currency
+    # setting); currencies without a configured rate are left out and listed.
+    currency: str = "CNY"
+    monthly_expense_total: Decimal = Decimal("0")
+    unconverted_currencies: list[str] = []
+    status_counts: dict[str, int] = {}
 
 
 class ExpenseTrendPoint(BaseModel):
     month: str
     cny: Decimal
     usd: Decimal
+    by_currency: dict[str, Decimal] = {}
+    currency: str = "CNY"
+    total: Decimal = Decimal("0")
 
 
 class CalendarDay(BaseModel):
@@ -23,3 +33,22 @@ class CalendarDay(BaseModel):
     service_names: list[str]
     category_colors: list[str]
     days_left: list[int]
+    # True where the entry is a projected future renewal rather than the
+    # subscription's current expire_date.
+    projected: list[bool] = []
+
+
+class ForecastMonth(BaseModel):
+    month: str  # YYYY-MM
+    payments: int
+    by_currency: dict[str, Decimal]
+    # Category id ("uncategorized" for none) -> amount in `currency`.
+    by_category: dict[str, Decimal]
+    total: Decimal
+
+
+class Forecast(BaseModel):
+    currency: str
+    total: Decimal
+    unconverted_currencies: list[str] = []
+    months: list[ForecastMonth]
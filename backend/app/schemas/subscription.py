@@ -2,7 +2,8 @@
 from datetime import date
 from decimal import Decimal
 from uuid import UUID
-from pydantic import BaseModel
+from typing import Literal
+from pydantic import BaseModel, Field, model_validator
 
 
 class SubscriptionBase(BaseModel):
@@ -54,3 +55,45 @@ class SubscriptionResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class ImportResult(BaseModel):
+    imported: int
+
+
+class BulkChanges(SubscriptionUpdate):
+    """Fields for a bulk update; the NOT NULL columns cannot be set to null."""
+
+    @model_validator(mode="after")
+    def _reject_required_nulls(self):
+        nulls = [
+            k for k in ("name", "cost", "currency", "billing_cycle", "expire_date")
+            if k in self.model_fields_set and getattr(self, k) is None
+        ]
+        if nulls:
+            raise ValueError(f"{', '.join(nulls)} cannot be null")
+        return self
+
+
+class BulkOperation(BaseModel):
+    action: Literal["renew", "delete", "set_category", "update"]
+    ids: list[UUID] = Field(min_length=1, max_length=5000)
+    # set_category: target category (null clears it).
+    category_id: UUID | None = None
+    # update: fields applied to every listed subscription.
+    changes: BulkChanges | None = None
+
+
+class BulkRequest(BaseModel):
+    operations: list[BulkOperation] = Field(min_length=1, max_length=20)
+
+
+class BulkOperationResult(BaseModel):
+    action: str
+    requested: int
+    affected: int
+    not_found: list[UUID] = []
+
+
+class BulkResult(BaseModel):
+    results: list[BulkOperationResult]
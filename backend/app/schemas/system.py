@@ -0,0 +1,49 @@
+"""System (runtime diagnostics) schemas."""
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class CacheStats(BaseModel):
+    hits: int
+    misses: int
+    size: int
+    ttl_seconds: float
+
+
+class SchedulerRun(BaseModel):
+    started_at: datetime
+    duration_seconds: float
+    outcome: str
+    sent: int = 0
+    failed: int = 0
+    error: str | None = None
+
+
+class SchedulerStatus(BaseModel):
+    is_leader: bool
+    notify_time: str
+    next_run_time: datetime | None
+    last_run: SchedulerRun | None
+
+
+class PoolStats(BaseModel):
+    size: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    wait_seconds_sum: float
+    wait_seconds_max: float
+    wait_histogram: dict[str, int]
+
+
+class HashingStats(BaseModel):
+    workers: int
+    max_pending: int
+    pending: int
+    completed: int
+    rejected: int
+    queue_seconds_sum: float
+    queue_seconds_max: float
+    run_seconds_sum: float
@@ -0,0 +1,118 @@
+"""Calendar month computation for /stats/calendar.
+
+Subscriptions are fetched once per request joined with their category color.
+Each day lists the subscriptions expiring on it plus, for subscriptions not
+yet expired, their future renewals projected by the renewal engine.
+Computed months are cached per (month, today, data version).
+"""
+from calendar import monthrange
+from datetime import date
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.category import Category
+from app.models.subscription import Subscription
+from app.services.data_version import current_data_version
+from app.services.renewal import occurrences, renewal_day
+from app.services.ttl_cache import MISSING, TTLCache
+
+DEFAULT_COLOR = "#4382FF"
+
+_month_cache = TTLCache(settings.calendar_cache_ttl_seconds, maxsize=256)
+
+
+def calendar_cache_stats() -> dict:
+    return _month_cache.stats()
+
+
+def _shift_month(year: int, month: int, n: int) -> tuple[int, int]:
+    idx = year * 12 + month - 1 + n
+    return idx // 12, idx % 12 + 1
+
+
+def _month_bounds(year: int, month: int) -> tuple[date, date]:
+    return date(year, month, 1), date(year, month, monthrange(year, month)[1])
+
+
+def _empty_month(year: int, month: int) -> dict[date, dict]:
+    return {
+        date(year, month, d): {
+            "date": date(year, month, d).isoformat(),
+            "service_ids": [],
+            "service_names": [],
+            "category_colors": [],
+            "days_left": [],
+            "projected": [],
+        }
+        for d in range(1, monthrange(year, month)[1] + 1)
+    }
+
+
+async def _compute_months(db: AsyncSession, months: list[tuple[int, int]], today: date) -> dict:
+    start = _month_bounds(*months[0])[0]
+    end = _month_bounds(*months[-1])[1]
+    days: dict[date, dict] = {}
+    for year, month in months:
+        days.update(_empty_month(year, month))
+    rows = await db.execute(
+        select(
+            Subscription.id,
+            Subscription.name,
+            Subscription.expire_date,
+            Subscription.billing_cycle,
+            Subscription.start_date,
+            Subscription.renewal_day,
+            Category.color,
+        )
+        .outerjoin(Category, Category.id == Subscription.category_id)
+        .where(
+            Subscription.expire_date <= end,
+            # Expiring in range, or still live and so projected into it.
+            or_(Subscription.expire_date >= start, Subscription.expire_date >= today),
+        )
+        .order_by(Subscription.expire_date, Subscription.id)
+    )
+    for sub_id, name, expire_date, billing_cycle, start_date, stored_day, color in rows:
+        sub_id = str(sub_id)
+        color = color or DEFAULT_COLOR
+        # Expired subscriptions are shown on their expire_date only.
+        max_k = None if expire_date >= today else 0
+        day = renewal_day(expire_date, start_date, stored_day)
+        for k, occurrence in occurrences(expire_date, billing_cycle, start, end, max_k, day):
+            entry = days.get(occurrence)
+            if entry is None:
+                # Between two requested months that were not both missing.
+                continue
+            entry["service_ids"].append(sub_id)
+            entry["service_names"].append(name)
+            entry["category_colors"].append(color)
+            entry["days_left"].append((occurrence - today).days)
+            entry["projected"].append(k > 0)
+    result = {}
+    for year, month in months:
+        first, last = _month_bounds(year, month)
+        result[(year, month)] = [days[date.fromordinal(o)] for o in range(first.toordinal(), last.toordinal() + 1)]
+    return result
+
+
+async def calendar_days(db: AsyncSession, year: int, month: int, months: int = 1) -> list[dict]:
+    """Day entries for `months` consecutive months starting at year/month."""
+    today = date.today()
+    version = await current_data_version()
+    wanted = [_shift_month(year, month, i) for i in range(months)]
+    cached = {}
+    missing = []
+    for ym in wanted:
+        value = _month_cache.get((ym, today, version))
+        if value is MISSING:
+            missing.append(ym)
+        else:
+            cached[ym] = value
+    if missing:
+        computed = await _compute_months(db, missing, today)
+        for ym, value in computed.items():
+            _month_cache.set((ym, today, version), value)
+        cached.update(computed)
+    return [day for ym in wanted for day in cached[ym]]
@@ -0,0 +1,103 @@
+"""Cross-process change notifications over Postgres LISTEN/NOTIFY.
+
+Writers call notify() inside their transaction; Postgres delivers the message
+on commit to every process running the listener thread, which dispatches it
+to the callbacks registered with subscribe().
+"""
+import logging
+import select
+import threading
+from collections import defaultdict
+from typing import Callable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+# Payload passed to callbacks after a reconnect, when notifications may have
+# been missed and listeners should drop everything they cache.
+RESYNC = "*"
+
+_callbacks: dict[str, list[Callable[[str], None]]] = defaultdict(list)
+_stop = threading.Event()
+_thread: threading.Thread | None = None
+
+
+def subscribe(channel: str, callback: Callable[[str], None]):
+    """Register callback(payload) for notifications on channel."""
+    _callbacks[channel].append(callback)
+
+
+def notify(db: Session, channel: str, payload: str = ""):
+    """Queue a notification; it is delivered when db's transaction commits."""
+    if settings.pg_notify_enabled:
+        db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload})
+
+
+async def notify_async(db: AsyncSession, channel: str, payload: str = ""):
+    """notify() for an AsyncSession."""
+    if settings.pg_notify_enabled:
+        await db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload})
+
+
+def _dispatch(channel: str, payload: str):
+    for callback in _callbacks.get(channel, []):
+        try:
+            callback(payload)
+        except Exception:
+            logger.exception("change feed callback failed for %s", channel)
+
+
+def _listen_once():
+    # A dedicated DBAPI connection outside the pool: it stays idle in LISTEN
+    # for the life of the process.
+    cargs, cparams = engine.dialect.create_connect_args(engine.url)
+    conn = engine.dialect.connect(*cargs, **cparams)
+    try:
+        conn.autocommit = True
+        cur = conn.cursor()
+        for channel in list(_callbacks):
+            cur.execute(f'LISTEN "{channel}"')
+        # Anything sent while we were disconnected is lost.
+        for channel in list(_callbacks):
+            _dispatch(channel, RESYNC)
+        while not _stop.is_set():
+            if select.select([conn], [], [], 5.0) == ([], [], []):
+                continue
+            conn.poll()
+            while conn.notifies:
+                n = conn.notifies.pop(0)
+                _dispatch(n.channel, n.payload)
+    finally:
+        conn.close()
+
+
+def _run():
+    while not _stop.is_set():
+        try:
+            _listen_once()
+        except Exception:
+            logger.exception("change feed listener disconnected; retrying")
+            _stop.wait(5.0)
+
+
+def start_listener():
+    global _thread
+    if not settings.pg_notify_enabled or _thread is not None:
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_run, name="change-feed", daemon=True)
+    _thread.start()
+
+
+def stop_listener():
+    global _thread
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout=6.0)
+        _thread = None
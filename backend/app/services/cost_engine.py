@@ -0,0 +1,205 @@
+"""Cost normalization and currency conversion for the stats endpoints.
+
+Inputs are columnar (parallel sequences of cost, currency, billing_cycle and
+dates) so SQL result columns can be fed straight in. Costs are summed as
+Decimal per (currency, billing_cycle) group and divided by the cycle length
+once per group, so there is no float arithmetic and a single rounding step
+at the very end (quantize).
+"""
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Sequence
+
+from app.services.renewal import cycle_length_months, occurrences, parse_cycle
+from app.services.settings_repo import get_settings_many_async, loads_setting
+
+# Rates are stored as units of PIVOT_CURRENCY per one unit of a currency; the
+# existing exchange_rate setting is CNY per USD.
+PIVOT_CURRENCY = "CNY"
+DEFAULT_USD_RATE = "7.2"
+CENT = Decimal("0.01")
+
+GroupKey = tuple[str, str]  # (currency, billing_cycle)
+
+
+def quantize(amount: Decimal) -> Decimal:
+    return amount.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def normalize(sums: dict[GroupKey, Decimal], period_months: int = 1) -> dict[str, Decimal]:
+    """Per-currency cost for a period of `period_months`, unrounded."""
+    out: dict[str, Decimal] = defaultdict(Decimal)
+    for (currency, billing_cycle), total in sums.items():
+        out[currency] += total * period_months / cycle_length_months(billing_cycle)
+    return dict(out)
+
+
+def monthly_series(
+    costs: Sequence[Decimal],
+    currencies: Sequence[str],
+    billing_cycles: Sequence[str],
+    start_dates: Sequence[date | None],
+    expire_dates: Sequence[date],
+    month_starts: list[date],
+    month_ends: list[date],
+) -> dict[str, list[Decimal]]:
+    """Per-currency monthly cost for each month in [month_starts[i], month_ends[i]].
+
+    A row counts in every month between its start_date (or the first month)
+    and its expire_date. Each row covers a contiguous run of months, so it is
+    added to a difference array per (currency, cycle) and prefix-summed once.
+    """
+    n = len(month_starts)
+    deltas: dict[GroupKey, list[Decimal]] = {}
+    # Dates repeat heavily across rows; memoize the month lookups.
+    first_of: dict[date | None, int] = {None: 0}
+    last_of: dict[date, int] = {}
+    for cost, currency, billing_cycle, start, expire in zip(
+        costs, currencies, billing_cycles, start_dates, expire_dates
+    ):
+        first = first_of.get(start)
+        if first is None:
+            first = first_of[start] = bisect_left(month_ends, start)
+        last = last_of.get(expire)
+        if last is None:
+            last = last_of[expire] = bisect_right(month_starts, expire) - 1
+        if first > last:
+            continue
+        delta = deltas.get((currency, billing_cycle))
+        if delta is None:
+            delta = deltas[(currency, billing_cycle)] = [Decimal(0)] * (n + 1)
+        delta[first] += cost
+        delta[last + 1] -= cost
+    series: dict[str, list[Decimal]] = {}
+    for (currency, billing_cycle), delta in deltas.items():
+        months = cycle_length_months(billing_cycle)
+        out = series.setdefault(currency, [Decimal(0)] * n)
+        running = Decimal(0)
+        for i in range(n):
+            running += delta[i]
+            out[i] += running / months
+    return series
+
+
+def payment_series(
+    costs: Sequence[Decimal],
+    counts: Sequence[int],
+    currencies: Sequence[str],
+    keys: Sequence,
+    billing_cycles: Sequence[str],
+    expire_dates: Sequence[date],
+    start: date,
+    months: int,
+) -> tuple[dict[tuple[str, object], list[Decimal]], list[int]]:
+    """Projected cash-out per (currency, key) for `months` calendar months from start.
+
+    Every row pays `cost` on each renewal date (expire_date, then one cycle
+    later, ...) from start to the end of the last month. Rows may be
+    pre-aggregated: `costs` is then the group's summed cost and `counts` its
+    size. Returns the amounts plus the number of payments per month.
+    """
+    base = start.year * 12 + start.month
+    last_year, last_month0 = divmod(base - 1 + months - 1, 12)
+    end = date(last_year, last_month0 + 1, 1) + timedelta(days=31)
+    end = end - timedelta(days=end.day)
+    start_ordinal, end_ordinal = start.toordinal(), end.toordinal()
+    fromordinal = date.fromordinal
+    amounts: dict[tuple[str, object], list[Decimal]] = {}
+    payments = [0] * months
+    for cost, count, currency, key, billing_cycle, expire in zip(
+        costs, counts, currencies, keys, billing_cycles, expire_dates
+    ):
+        series = amounts.get((currency, key))
+        if series is None:
+            series = amounts[(currency, key)] = [Decimal(0)] * months
+        cycle = parse_cycle(billing_cycle)
+        if cycle.months and expire >= start:
+            # Clamping never changes the month, so only month indexes matter.
+            indexes = range(expire.year * 12 + expire.month - base, months, cycle.months)
+        elif cycle.days:
+            first = expire.toordinal()
+            if first < start_ordinal:
+                first += -(-(start_ordinal - first) // cycle.days) * cycle.days
+            indexes = [
+                (d := fromordinal(o)).year * 12 + d.month - base
+                for o in range(first, end_ordinal + 1, cycle.days)
+            ]
+        else:
+            indexes = [
+                when.year * 12 + when.month - base
+                for _, when in occurrences(expire, billing_cycle, start, end)
+            ]
+        for i in indexes:
+            series[i] += cost
+            payments[i] += count
+    return amounts, payments
+
+
+@dataclass(frozen=True)
+class RateTable:
+    """Exchange rates (PIVOT_CURRENCY per unit) and the reporting currency."""
+
+    rates: dict[str, Decimal] = field(default_factory=dict)
+    base: str = PIVOT_CURRENCY
+
+    def convert(self, amount: Decimal, currency: str, target: str | None = None) -> Decimal | None:
+        """amount in `currency` expressed in `target` (default base); None without a rate."""
+        target = target or self.base
+        if currency == target:
+            return amount
+        src = self.rates.get(currency)
+        dst = self.rates.get(target)
+        if src is None or dst is None:
+            return None
+        return amount * src / dst
+
+    def total(self, by_currency: dict[str, Decimal], target: str | None = None) -> tuple[Decimal, list[str]]:
+        """Sum of amounts converted to target, plus the currencies that had no rate."""
+        total = Decimal(0)
+        missing: list[str] = []
+        for currency, amount in by_currency.items():
+            converted = self.convert(amount, currency, target)
+            if converted is None:
+                missing.append(currency)
+            else:
+                total += converted
+        return total, sorted(missing)
+
+
+def _parse_rate(value) -> Decimal | None:
+    try:
+        rate = Decimal(str(value))
+    except ArithmeticError:
+        return None
+    return rate if rate.is_finite() and rate > 0 else None
+
+
+def build_rate_table(
+    exchange_rate: str | None,
+    exchange_rates: dict | None,
+    default_currency: str | None,
+) -> RateTable:
+    rates = {PIVOT_CURRENCY: Decimal(1)}
+    usd = _parse_rate(exchange_rate or DEFAULT_USD_RATE)
+    if usd is not None:
+        rates["USD"] = usd
+    if not isinstance(exchange_rates, dict):
+        exchange_rates = {}
+    for code, value in exchange_rates.items():
+        rate = _parse_rate(value)
+        if rate is not None and str(code).upper() != PIVOT_CURRENCY:
+            rates[str(code).upper()] = rate
+    return RateTable(rates, default_currency or PIVOT_CURRENCY)
+
+
+async def load_rate_table() -> RateTable:
+    """Rate table from the exchange_rate / exchange_rates / default_currency settings."""
+    values = await get_settings_many_async(["exchange_rate", "exchange_rates", "default_currency"])
+    return build_rate_table(
+        values["exchange_rate"],
+        loads_setting(values["exchange_rates"], {}),
+        values["default_currency"],
+    )
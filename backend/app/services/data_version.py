@@ -0,0 +1,36 @@
+"""Global data version for caches derived from subscriptions and categories.
+
+The version is a settings row, so reading it is served by the settings cache
+and every process sees a bump through the settings change feed. Writers bump
+it inside their own transaction, so the new version is visible exactly when
+the data change is.
+"""
+import uuid
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services import change_feed
+from app.services.settings_repo import (
+    SETTINGS_CHANNEL,
+    get_settings_many_async,
+    invalidate_settings_cache,
+    upsert_settings_stmt,
+)
+
+DATA_VERSION_KEY = "data_version"
+
+
+def new_data_version() -> str:
+    return uuid.uuid4().hex
+
+
+async def current_data_version() -> str:
+    return (await get_settings_many_async([DATA_VERSION_KEY]))[DATA_VERSION_KEY] or "0"
+
+
+async def bump_data_version(db: AsyncSession):
+    """Stage a new data version in db's transaction; it takes effect on commit."""
+    await db.execute(upsert_settings_stmt({DATA_VERSION_KEY: new_data_version()}))
+    await change_feed.notify_async(db, SETTINGS_CHANNEL, DATA_VERSION_KEY)
+    event.listen(db.sync_session, "after_commit", lambda session: invalidate_settings_cache(), once=True)
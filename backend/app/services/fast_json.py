@@ -0,0 +1,35 @@
+"""orjson-backed JSON responses for the large list endpoints.
+
+List endpoints select plain column tuples and hand dicts straight to
+ORJSONResponse, skipping per-row pydantic model construction and FastAPI's
+response_model re-validation. The output matches what pydantic produces for
+the same response models: UUID/date as strings, Decimal as its string form,
+UTC datetimes with a trailing "Z".
+"""
+from decimal import Decimal
+from typing import Any, Iterable, Sequence
+
+import orjson
+from fastapi.responses import JSONResponse
+
+_OPTIONS = orjson.OPT_UTC_Z
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def rows_to_dicts(keys: Sequence[str], rows: Iterable[Sequence[Any]]) -> list[dict]:
+    """Zip SQL row tuples with column keys."""
+    return [dict(zip(keys, row)) for row in rows]
@@ -0,0 +1,110 @@
+"""Leader election across processes with a Postgres advisory lock.
+
+Every process runs a LeaderElection thread that keeps trying
+pg_try_advisory_lock on its own dedicated connection. The holder is leader
+until that connection dies: the lock is session-scoped, so Postgres releases
+it as soon as the leader process exits or loses its connection, and another
+process takes over on its next attempt.
+"""
+import logging
+import threading
+from typing import Callable
+
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderElection:
+    def __init__(
+        self,
+        lock_id: int,
+        on_elected: Callable[[], None],
+        on_demoted: Callable[[], None],
+        interval: float = 10.0,
+    ):
+        self.lock_id = lock_id
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.interval = interval
+        self.is_leader = False
+        self._conn = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _connect(self):
+        cargs, cparams = engine.dialect.create_connect_args(engine.url)
+        conn = engine.dialect.connect(*cargs, **cparams)
+        conn.autocommit = True
+        return conn
+
+    def _close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def _scalar(self, sql: str, *params):
+        cur = self._conn.cursor()
+        try:
+            cur.execute(sql, params)
+            return cur.fetchone()[0]
+        finally:
+            cur.close()
+
+    def _tick(self):
+        if self.is_leader:
+            # Heartbeat: as long as this connection is alive we hold the lock.
+            try:
+                self._scalar("SELECT 1")
+            except Exception:
+                logger.warning("leader connection lost; stepping down")
+                self._step_down()
+            return
+        try:
+            if self._conn is None:
+                self._conn = self._connect()
+            acquired = self._scalar("SELECT pg_try_advisory_lock(%s)", self.lock_id)
+        except Exception:
+            logger.exception("leader election attempt failed")
+            self._close()
+            return
+        if not acquired:
+            return
+        self.is_leader = True
+        logger.info("elected leader (advisory lock %s)", self.lock_id)
+        try:
+            self.on_elected()
+        except Exception:
+            logger.exception("on_elected callback failed; releasing leadership")
+            self._step_down()
+
+    def _step_down(self):
+        self.is_leader = False
+        self._close()
+        try:
+            self.on_demoted()
+        except Exception:
+            logger.exception("on_demoted callback failed")
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._tick()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="leader-election", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+        if self.is_leader:
+            # Closing the session releases the advisory lock.
+            self._step_down()
+        self._close()
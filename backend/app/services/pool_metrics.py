@@ -0,0 +1,71 @@
+"""Connection pool instrumentation.
+
+instrumented(pool_cls) returns a subclass of a SQLAlchemy pool class that
+times every Pool.connect() call -- the wait for a free connection plus the
+pre-ping, if enabled -- into a PoolMetrics histogram.
+"""
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+# Upper bounds (milliseconds) of the checkout wait histogram buckets.
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_sum = 0.0
+        self.wait_seconds_max = 0.0
+        self._buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        ms = seconds * 1000
+        i = 0
+        while i < len(WAIT_BUCKETS_MS) and ms > WAIT_BUCKETS_MS[i]:
+            i += 1
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_sum += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            self._buckets[i] += 1
+
+    def timed_out(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            histogram = {f"le_{b}ms": n for b, n in zip(WAIT_BUCKETS_MS, self._buckets)}
+            histogram["inf"] = self._buckets[-1]
+            return {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_sum": round(self.wait_seconds_sum, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+                "wait_histogram": histogram,
+            }
+
+
+def instrumented(pool_cls):
+    """Subclass pool_cls with its own PoolMetrics (survives pool.recreate())."""
+    metrics = PoolMetrics()
+
+    def connect(self):
+        t0 = time.perf_counter()
+        try:
+            conn = pool_cls.connect(self)
+        except PoolTimeoutError:
+            metrics.timed_out()
+            raise
+        metrics.observe(time.perf_counter() - t0)
+        return conn
+
+    return type(f"Instrumented{pool_cls.__name__}", (pool_cls,), {"metrics": metrics, "connect": connect})
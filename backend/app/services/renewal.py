@@ -0,0 +1,207 @@
+"""Renewal date engine: calendar-correct billing cycles.
+
+A cycle is monthly / quarterly / yearly or a custom interval "<n>d", "<n>w",
+"<n>m" or "<n>y" (e.g. "6m", "14d"). Month-based cycles add calendar months
+and clamp to the end of shorter months. They land on a fixed renewal day
+(renewal_day, kept in Subscription.renewal_day once renewed), so a Jan 31
+series runs Feb 28, Mar 31, Apr 30, ... without drifting, also when renewed
+one step at a time from a clamped expire_date.
+Unknown cycles renew monthly, as elsewhere in the app.
+"""
+import re
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from functools import lru_cache
+from typing import Iterable, Sequence
+
+from sqlalchemy import Date, DateTime, Integer, and_, case, cast, extract, func
+
+from app.models.subscription import Subscription
+
+
+@dataclass(frozen=True)
+class Cycle:
+    months: int = 0
+    days: int = 0
+
+
+MONTHLY = Cycle(months=1)
+NAMED_CYCLES = {"monthly": MONTHLY, "quarterly": Cycle(months=3), "yearly": Cycle(months=12)}
+_CUSTOM = re.compile(r"^(\d{1,4})([dwmy])$")
+_UNITS = {"d": Cycle(days=1), "w": Cycle(days=7), "m": Cycle(months=1), "y": Cycle(months=12)}
+_DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+_DAYS_PER_MONTH = Decimal("365.25") / 12
+
+
+@lru_cache(maxsize=256)
+def parse_cycle(billing_cycle: str | None) -> Cycle:
+    named = NAMED_CYCLES.get(billing_cycle or "")
+    if named is not None:
+        return named
+    match = _CUSTOM.match((billing_cycle or "").strip().lower())
+    if not match or int(match.group(1)) == 0:
+        return MONTHLY
+    n, unit = int(match.group(1)), _UNITS[match.group(2)]
+    return Cycle(months=unit.months * n, days=unit.days * n)
+
+
+def cycle_length_months(billing_cycle: str | None) -> Decimal:
+    """Cycle length in months (day-based cycles use the mean month length)."""
+    cycle = parse_cycle(billing_cycle)
+    if cycle.months:
+        return Decimal(cycle.months)
+    return cycle.days / _DAYS_PER_MONTH
+
+
+def _days_in_month(year: int, month: int) -> int:
+    if month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+        return 29
+    return _DAYS_IN_MONTH[month - 1]
+
+
+def renewal_day(expire_date: date, start_date: date | None = None, stored: int | None = None) -> int:
+    """Day of the month that month-based renewals land on.
+
+    The stored day (Subscription.renewal_day, set by renew) when present;
+    else start_date's day when expire_date is that day clamped to its month
+    (a series started on the 31st that is now at Feb 28 returns to the 31st);
+    else expire_date's own day.
+    """
+    if stored:
+        return stored
+    if start_date is not None and start_date.day > expire_date.day:
+        if expire_date.day == _days_in_month(expire_date.year, expire_date.month):
+            return start_date.day
+    return expire_date.day
+
+
+def add_cycles(anchor: date, cycle: Cycle, k: int, day: int | None = None) -> date:
+    """anchor advanced by k cycles (k may be negative).
+
+    Month-based cycles land on `day` (default anchor.day), clamped to the
+    month's length.
+    """
+    if cycle.months:
+        year, month0 = divmod(anchor.year * 12 + anchor.month - 1 + cycle.months * k, 12)
+        return date(year, month0 + 1, min(day or anchor.day, _days_in_month(year, month0 + 1)))
+    return anchor + timedelta(days=cycle.days * k)
+
+
+def next_renewal(expire_date: date, billing_cycle: str | None, day: int | None = None) -> date:
+    """expire_date after one renewal, on renewal day `day` (default expire_date.day)."""
+    return add_cycles(expire_date, parse_cycle(billing_cycle), 1, day)
+
+
+def renewal_dates(
+    expire_dates: Sequence[date],
+    billing_cycles: Sequence[str | None],
+    n: int,
+    days: Sequence[int | None] | None = None,
+) -> list[list[date]]:
+    """The next n renewal dates after each expire_date (columnar input).
+
+    days optionally gives each row's renewal day (default its expire_date's).
+    """
+    out: list[list[date]] = []
+    append = out.append
+    if days is None:
+        days = [None] * len(expire_dates)
+    for anchor, billing_cycle, day in zip(expire_dates, billing_cycles, days):
+        cycle = parse_cycle(billing_cycle)
+        if cycle.months:
+            base = anchor.year * 12 + anchor.month - 1
+            step = cycle.months
+            day = day or anchor.day
+            if day <= 28:
+                # Every month has the day: no clamping needed.
+                append([date(i // 12, i % 12 + 1, day) for i in range(base + step, base + step * n + 1, step)])
+            else:
+                append([
+                    date(i // 12, i % 12 + 1, min(day, _days_in_month(i // 12, i % 12 + 1)))
+                    for i in range(base + step, base + step * n + 1, step)
+                ])
+        else:
+            ordinal = anchor.toordinal()
+            append([date.fromordinal(ordinal + cycle.days * k) for k in range(1, n + 1)])
+    return out
+
+
+def occurrences(
+    anchor: date,
+    billing_cycle: str | None,
+    start: date,
+    end: date,
+    max_k: int | None = None,
+    day: int | None = None,
+) -> list[tuple[int, date]]:
+    """(k, anchor + k cycles) for k >= 0 (and <= max_k) falling within [start, end].
+
+    `day` is the renewal day for month-based cycles (see renewal_day).
+    """
+    if anchor > end:
+        return []
+    cycle = parse_cycle(billing_cycle)
+    # Jump straight to the first cycle that can reach start.
+    k = 0
+    if anchor < start:
+        if cycle.months:
+            gap = (start.year - anchor.year) * 12 + start.month - anchor.month
+            k = max(gap // cycle.months - 1, 0)
+        else:
+            k = (start - anchor).days // cycle.days
+    result = []
+    while max_k is None or k <= max_k:
+        occurrence = add_cycles(anchor, cycle, k, day) if k else anchor
+        if occurrence > end:
+            break
+        if occurrence >= start:
+            result.append((k, occurrence))
+        k += 1
+    return result
+
+
+def _sql_month_start(d):
+    return func.date_trunc("month", cast(d, DateTime))
+
+
+def _sql_days_in_month(month_start):
+    """Length of the month starting at timestamp month_start."""
+    return cast(extract("day", month_start + func.make_interval(0, 1) - func.make_interval(0, 0, 0, 1)), Integer)
+
+
+def renewal_day_expr():
+    """SQL counterpart of renewal_day over Subscription's columns."""
+    expire_day = cast(extract("day", Subscription.expire_date), Integer)
+    start_day = cast(extract("day", Subscription.start_date), Integer)
+    month_length = _sql_days_in_month(_sql_month_start(Subscription.expire_date))
+    return func.coalesce(
+        Subscription.renewal_day,
+        case((and_(start_day > expire_day, expire_day == month_length), start_day), else_=expire_day),
+    )
+
+
+def _sql_add_cycle(expire_date, cycle: Cycle, day):
+    if cycle.months:
+        # First of the target month, then the renewal day clamped to its length.
+        month_start = _sql_month_start(expire_date) + func.make_interval(0, cycle.months)
+        return cast(month_start, Date) + func.least(day, _sql_days_in_month(month_start)) - 1
+    return expire_date + cycle.days
+
+
+def next_renewal_expr(billing_cycles: Iterable[str | None], day=None):
+    """SQL counterpart of next_renewal over Subscription.expire_date.
+
+    billing_cycles lists the cycle values the statement will meet (e.g. the
+    DISTINCT values among the targeted rows); anything else renews monthly.
+    day defaults to renewal_day_expr().
+    """
+    if day is None:
+        day = renewal_day_expr()
+    whens = []
+    for billing_cycle in sorted({c for c in billing_cycles if c is not None}):
+        cycle = parse_cycle(billing_cycle)
+        if cycle != MONTHLY:
+            whens.append((Subscription.billing_cycle == billing_cycle, _sql_add_cycle(Subscription.expire_date, cycle, day)))
+    monthly = _sql_add_cycle(Subscription.expire_date, MONTHLY, day)
+    return case(*whens, else_=monthly) if whens else monthly
@@ -0,0 +1,49 @@
+"""Serialized-response cache with strong ETags for read-mostly endpoints.
+
+The cache key is the endpoint's parameters plus today's date and the global
+data version, so the ETag is known before any work is done: a matching
+If-None-Match gets 304 without touching the database, and a repeat request
+gets the cached bytes without re-serializing.
+"""
+import hashlib
+from datetime import date
+from typing import Any, Awaitable, Callable
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from app.config import settings
+from app.services.data_version import current_data_version
+from app.services.ttl_cache import MISSING, TTLCache
+
+_responses = TTLCache(settings.stats_cache_ttl_seconds, maxsize=512)
+
+
+def response_cache_stats() -> dict:
+    return _responses.stats()
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+async def cached_response(
+    request: Request,
+    key: tuple,
+    adapter: TypeAdapter,
+    compute: Callable[[], Awaitable[Any]],
+) -> Response:
+    full_key = key + (date.today().isoformat(), await current_data_version())
+    etag = '"' + hashlib.sha1(repr(full_key).encode()).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    body = _responses.get(full_key)
+    if body is MISSING:
+        body = adapter.dump_json(await compute())
+        _responses.set(full_key, body)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,40 +1,154 @@
-"""Read/write key-value settings from DB."""
+"""Read/write key-value settings from DB.
+
+Reads are served from an in-process cache holding every key, loaded with a
+single query and kept for settings_cache_ttl_seconds. Writes invalidate it
+locally and, through the change feed, in every other process.
+"""
+import json
+import threading
+import time
+
+from sqlalchemy import func
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.dialects.postgresql import insert
+
+from app.config import settings
 from app.database import SessionLocal
 from app.models.setting import Setting
-import json
+from app.services import change_feed
+
+SETTINGS_CHANNEL = "subtracker_settings"
+
+
+class _SettingsCache:
+    """All settings, reloaded at most once at a time (self._lock).
+
+    invalidate() never takes the lock: it runs in commit hooks on the event
+    loop, which must not wait behind a reload. It bumps a generation instead,
+    and a reload that raced with it does not keep its result.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._values: dict[str, str | None] | None = None
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def fresh(self) -> dict[str, str | None] | None:
+        """Cached values if still valid (counted as a hit), else None without loading."""
+        values = self._values
+        if values is not None and time.monotonic() - self._loaded_at < self.ttl:
+            self.hits += 1
+            return values
+        return None
+
+    def get_all(self) -> dict[str, str | None]:
+        with self._lock:
+            if self._values is not None and time.monotonic() - self._loaded_at < self.ttl:
+                self.hits += 1
+                return self._values
+            self.misses += 1
+            generation = self._generation
+            db = SessionLocal()
+            try:
+                values = dict(db.query(Setting.key, Setting.value).all())
+            finally:
+                db.close()
+            self._loaded_at = time.monotonic()
+            self._values = values
+            # Checked after publishing: an invalidate() that ran during the
+            # load may predate the write above, so undo it here.
+            if self._generation != generation:
+                self._values = None
+            return values
+
+    def invalidate(self):
+        self._generation += 1
+        self._values = None
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._values or {}),
+            "ttl_seconds": self.ttl,
+        }
+
+
+_cache = _SettingsCache(settings.settings_cache_ttl_seconds)
+change_feed.subscribe(SETTINGS_CHANNEL, lambda key: _cache.invalidate())
+
+
+def settings_cache_stats() -> dict:
+    return _cache.stats()
+
+
+def invalidate_settings_cache():
+    _cache.invalidate()
 
 
 def get_setting(key: str, default: str | None = None) -> str | None:
-    db = SessionLocal()
-    try:
-        row = db.query(Setting).filter(Setting.key == key).first()
-        return row.value if row else default
-    finally:
-        db.close()
+    values = _cache.get_all()
+    return values[key] if key in values else default
 
 
-def set_setting(key: str, value: str | None):
+async def get_settings_many_async(keys: list[str]) -> dict[str, str | None]:
+    """get_settings_many for async handlers: a reload runs off the event loop."""
+    values = _cache.fresh()
+    if values is None:
+        values = await run_in_threadpool(_cache.get_all)
+    return {key: values.get(key) for key in keys}
+
+
+def get_settings_many(keys: list[str]) -> dict[str, str | None]:
+    """Values for keys (missing keys map to None), from one cache load at most."""
+    values = _cache.get_all()
+    return {key: values.get(key) for key in keys}
+
+
+def upsert_settings_stmt(mapping: dict[str, str | None]):
+    """INSERT ... ON CONFLICT DO UPDATE writing every key in mapping."""
+    stmt = insert(Setting).values([{"key": k, "value": v} for k, v in mapping.items()])
+    return stmt.on_conflict_do_update(
+        index_elements=[Setting.key],
+        set_={"value": stmt.excluded.value, "updated_at": func.now()},
+    )
+
+
+def set_settings_many(mapping: dict[str, str | None]):
+    """Upsert every key in mapping with one INSERT ... ON CONFLICT in one transaction."""
+    if not mapping:
+        return
     db = SessionLocal()
     try:
-        row = db.query(Setting).filter(Setting.key == key).first()
-        if row:
-            row.value = value
-        else:
-            db.add(Setting(key=key, value=value))
+        db.execute(upsert_settings_stmt(mapping))
+        change_feed.notify(db, SETTINGS_CHANNEL, ",".join(mapping))
         db.commit()
     finally:
         db.close()
+        _cache.invalidate()
 
 
-def get_setting_json(key: str, default=None):
-    v = get_setting(key)
-    if v is None:
+def set_setting(key: str, value: str | None):
+    set_settings_many({key: value})
+
+
+def loads_setting(value: str | None, default=None):
+    """Decode a JSON setting value, falling back to default."""
+    if value is None:
         return default
     try:
-        return json.loads(v)
+        return json.loads(value)
     except Exception:
         return default
 
 
+def get_setting_json(key: str, default=None):
+    return loads_setting(get_setting(key), default)
+
+
 def set_setting_json(key: str, value):
     set_setting(key, json.dumps(value) if value is not None else None)
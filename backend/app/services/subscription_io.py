@@ -0,0 +1,212 @@
+"""Bulk subscription import (CSV / JSON Lines) and streaming export.
+
+Import reads the uploaded file in a worker thread, validates each record
+with SubscriptionCreate and inserts chunk by chunk with executemany, all in
+one transaction. Export streams rows from a server-side cursor (yield_per)
+on its own session, so the full list is never materialized.
+"""
+import codecs
+import csv
+import io
+import json
+from datetime import date
+from typing import AsyncIterator, BinaryIO, Iterator
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import iterate_in_threadpool
+
+from app.database import AsyncSessionLocal
+from app.models.subscription import Subscription
+from app.schemas.subscription import SubscriptionCreate
+from app.services.fast_json import dumps
+from app.services.subscription_status import compute_status, status_expr
+
+FORMATS = ("csv", "jsonl")
+CHUNK_SIZE = 1000
+MAX_ERRORS = 50
+
+EXPORT_COLUMNS = (
+    Subscription.id,
+    Subscription.name,
+    Subscription.category_id,
+    Subscription.provider,
+    Subscription.cost,
+    Subscription.currency,
+    Subscription.billing_cycle,
+    Subscription.start_date,
+    Subscription.expire_date,
+    Subscription.notes,
+    Subscription.url,
+    Subscription.notify_days,
+)
+EXPORT_KEYS = [c.key for c in EXPORT_COLUMNS] + ["status"]
+
+
+class ImportFailed(Exception):
+    """Raised with per-line errors; nothing from the upload was written."""
+
+    def __init__(self, errors: list[dict]):
+        super().__init__(f"{len(errors)} invalid record(s)")
+        self.errors = errors
+
+
+def _csv_record(row: dict) -> dict:
+    """CSV cells are strings: empty means unset, notify_days is "7,3,1" or JSON."""
+    record = {k.strip(): v.strip() for k, v in row.items() if k and v is not None and v.strip() != ""}
+    notify_days = record.get("notify_days")
+    if notify_days is not None:
+        if notify_days.startswith("["):
+            record["notify_days"] = json.loads(notify_days)
+        else:
+            record["notify_days"] = [int(d) for d in notify_days.replace(";", ",").split(",") if d.strip()]
+    return record
+
+
+class _UnreadableLine(Exception):
+    def __init__(self, line: int, error: str):
+        super().__init__(error)
+        self.line = line
+
+
+def _text_lines(file: BinaryIO) -> Iterator[str]:
+    """Decode the upload one line at a time, so a bad byte is pinned to its line."""
+    line_no = 0
+    for raw in file:
+        for part in raw.splitlines(keepends=True):
+            line_no += 1
+            if line_no == 1 and part.startswith(codecs.BOM_UTF8):
+                part = part[len(codecs.BOM_UTF8):]
+            try:
+                yield part.decode("utf-8")
+            except UnicodeDecodeError as e:
+                raise _UnreadableLine(line_no, f"not valid UTF-8 at byte {e.start + 1}; save the file as UTF-8")
+
+
+def _read_records(file: BinaryIO, fmt: str) -> Iterator[list[tuple[int, dict | Exception]]]:
+    """Yield chunks of (line number, record or parse error) from the upload.
+
+    A line that cannot be decoded (or a CSV syntax error) ends the read; it
+    is reported like an invalid record.
+    """
+    lines = _text_lines(file)
+    chunk: list[tuple[int, dict | Exception]] = []
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        try:
+            for row in reader:
+                try:
+                    item = _csv_record(row)
+                except ValueError as e:
+                    item = e
+                chunk.append((reader.line_num, item))
+                if len(chunk) >= CHUNK_SIZE:
+                    yield chunk
+                    chunk = []
+        except _UnreadableLine as e:
+            chunk.append((e.line, ValueError(str(e))))
+        except csv.Error as e:
+            # DictReader.line_num only advances per good row; the underlying
+            # reader has counted the failing line.
+            chunk.append((reader.reader.line_num, ValueError(f"malformed CSV: {e}")))
+    else:
+        try:
+            for line_no, line in enumerate(lines, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    item = json.loads(line)
+                    if not isinstance(item, dict):
+                        item = ValueError("expected a JSON object")
+                except ValueError as e:
+                    item = e
+                chunk.append((line_no, item))
+                if len(chunk) >= CHUNK_SIZE:
+                    yield chunk
+                    chunk = []
+        except _UnreadableLine as e:
+            chunk.append((e.line, ValueError(str(e))))
+    if chunk:
+        yield chunk
+
+
+def _error_message(e: Exception) -> str:
+    if isinstance(e, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(p) for p in err['loc']) or 'record'}: {err['msg']}" for err in e.errors()
+        )
+    return str(e)
+
+
+async def import_subscriptions(db: AsyncSession, file: BinaryIO, fmt: str) -> int:
+    """Validate and insert every record of the upload; returns the row count.
+
+    Raises ImportFailed (after reading the whole file, so all errors up to
+    MAX_ERRORS are reported) when any record is invalid. The caller owns the
+    transaction and must roll back in that case.
+    """
+    today = date.today()
+    imported = 0
+    errors: list[dict] = []
+    async for chunk in iterate_in_threadpool(_read_records(file, fmt)):
+        rows = []
+        for line, item in chunk:
+            try:
+                if isinstance(item, Exception):
+                    raise item
+                data = SubscriptionCreate.model_validate(item)
+            except (ValidationError, ValueError) as e:
+                if len(errors) < MAX_ERRORS:
+                    errors.append({"line": line, "error": _error_message(e)})
+                continue
+            row = data.model_dump()
+            row["status"] = compute_status(data.expire_date, today)
+            rows.append(row)
+        if errors:
+            # Keep validating to report errors, but stop writing.
+            continue
+        if rows:
+            await db.execute(insert(Subscription), rows)
+            imported += len(rows)
+    if errors:
+        raise ImportFailed(errors)
+    return imported
+
+
+def _csv_line(values: list) -> str:
+    buf = io.StringIO()
+    csv.writer(buf).writerow(values)
+    return buf.getvalue()
+
+
+def _csv_value(key: str, value) -> object:
+    if value is None:
+        return ""
+    if key == "notify_days":
+        return ",".join(str(d) for d in value)
+    return value
+
+
+async def export_subscriptions(fmt: str) -> AsyncIterator[bytes]:
+    """Stream every subscription as CSV (with header) or JSON Lines."""
+    if fmt == "csv":
+        yield codecs.BOM_UTF8 + _csv_line(EXPORT_KEYS).encode()
+    q = (
+        select(*EXPORT_COLUMNS, status_expr().label("status"))
+        .order_by(Subscription.expire_date, Subscription.id)
+        .execution_options(yield_per=CHUNK_SIZE)
+    )
+    # Own session: the request's dependency session may be closed before the
+    # response body has been streamed.
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(q)
+        async for partition in result.partitions():
+            if fmt == "csv":
+                buf = io.StringIO()
+                writer = csv.writer(buf)
+                for row in partition:
+                    writer.writerow([_csv_value(k, v) for k, v in zip(EXPORT_KEYS, row)])
+                yield buf.getvalue().encode()
+            else:
+                yield b"".join(dumps(dict(zip(EXPORT_KEYS, row))) + b"\n" for row in partition)
@@ -1,14 +1,61 @@
 """Compute subscription status from expire_date."""
-from datetime import date
+from datetime import date, timedelta
 
+from sqlalchemy import case
 
-def compute_status(expire_date: date) -> str:
-    today = date.today()
+from app.models.subscription import Subscription
+
+# Days-left thresholds shared by compute_status and the SQL-side predicates.
+EXPIRING_DAYS = 3
+EXPIRING_SOON_DAYS = 7
+STATUSES = ("expired", "expiring", "expiring-soon", "active")
+
+
+def compute_status(expire_date: date, today: date | None = None) -> str:
+    today = today or date.today()
     delta = (expire_date - today).days
     if delta < 0:
         return "expired"
-    if delta <= 3:
+    if delta <= EXPIRING_DAYS:
         return "expiring"
-    if delta <= 7:
+    if delta <= EXPIRING_SOON_DAYS:
         return "expiring-soon"
     return "active"
+
+
+def status_expr(today: date | None = None, expire_date=None):
+    """SQL counterpart of compute_status over Subscription.expire_date.
+
+    expire_date may be another date expression, e.g. the new value in an
+    UPDATE ... SET (which would otherwise see the old column value).
+
+    Usable in SELECT / GROUP BY / UPDATE. Reuse one instance when an
+    expression appears in both SELECT and GROUP BY so the bound dates match.
+    For WHERE, prefer status_expire_range: the same rows as a sargable range.
+    """
+    today = today or date.today()
+    if expire_date is None:
+        expire_date = Subscription.expire_date
+    return case(
+        (expire_date < today, "expired"),
+        (expire_date <= today + timedelta(days=EXPIRING_DAYS), "expiring"),
+        (expire_date <= today + timedelta(days=EXPIRING_SOON_DAYS), "expiring-soon"),
+        else_="active",
+    )
+
+
+def status_expire_range(status: str, today: date | None = None) -> tuple[date | None, date | None] | None:
+    """Inclusive expire_date bounds matching compute_status(...) == status.
+
+    Returns None for an unknown status; a None bound means unbounded.
+    """
+    today = today or date.today()
+    if status == "expired":
+        return None, today - timedelta(days=1)
+    if status == "expiring":
+        return today, today + timedelta(days=EXPIRING_DAYS)
+    if status == "expiring-soon":
+        return today + timedelta(days=EXPIRING_DAYS + 1), today + timedelta(days=EXPIRING_SOON_DAYS)
+    if status == "active":
+        return today + timedelta(days=EXPIRING_SOON_DAYS + 1), None
+    return None
@@ -1,19 +1,182 @@
-"""Send message via Telegram Bot."""
+"""Send message via Telegram Bot.
+
+send_telegram_message() is the one-off synchronous path (settings test
+button). Bulk delivery goes through TelegramDelivery: one pooled
+httpx.AsyncClient, bounded concurrency, per-chat and global pacing within
+Telegram's limits, honouring 429 retry_after and retrying transient errors
+with exponential backoff.
+"""
+import asyncio
+import random
+import threading
+import time
+
 import httpx
+
+from app.config import settings
 from app.services.settings_repo import get_setting
 
+# Telegram allows about one message per second per chat and 30 per second
+# overall for a bot.
+PER_CHAT_INTERVAL = 1.0
+GLOBAL_INTERVAL = 1.0 / 30
+
+_client: httpx.Client | None = None
+_client_lock = threading.Lock()
+
+
+def _api_url(token: str) -> str:
+    return f"{settings.telegram_api_base.rstrip('/')}/bot{token}/sendMessage"
+
+
+def _shared_client() -> httpx.Client:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(timeout=settings.telegram_timeout_seconds)
+        return _client
+
 
 def send_telegram_message(message: str, bot_token: str | None = None, chat_id: str | None = None) -> tuple[bool, str]:
     token = bot_token or get_setting("telegram_bot_token")
     cid = chat_id or get_setting("telegram_chat_id")
     if not token or not cid:
         return False, "Telegram bot token or chat ID not configured"
-    url = f"https://api.telegram.org/bot{token}/sendMessage"
     try:
-        with httpx.Client(timeout=10.0) as client:
-            r = client.post(url, json={"chat_id": cid, "text": message})
-            if r.status_code != 200:
-                return False, r.text or f"HTTP {r.status_code}"
-            return True, ""
+        r = _shared_client().post(_api_url(token), json={"chat_id": cid, "text": message})
+        if r.status_code != 200:
+            return False, r.text or f"HTTP {r.status_code}"
+        return True, ""
     except Exception as e:
         return False, str(e)
+
+
+class _Pacer:
+    """Spaces out calls so that consecutive ones are at least interval apart.
+
+    Slots are handed out up front, so a 429 cannot move slots already taken;
+    it sets blocked_until instead, which senders check right before posting.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.blocked_until = 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def block(self, seconds: float):
+        """Hold every send until seconds from now, e.g. after a 429 retry_after."""
+        until = time.monotonic() + seconds
+        self.blocked_until = max(self.blocked_until, until)
+        self._next = max(self._next, until)
+
+
+class TelegramDelivery:
+    """Async bulk sender; use as ``async with TelegramDelivery(token) as d``."""
+
+    def __init__(
+        self,
+        bot_token: str,
+        *,
+        api_base: str | None = None,
+        max_concurrency: int | None = None,
+        max_retries: int | None = None,
+        timeout: float | None = None,
+        per_chat_interval: float = PER_CHAT_INTERVAL,
+        global_interval: float = GLOBAL_INTERVAL,
+    ):
+        self.url = f"{(api_base or settings.telegram_api_base).rstrip('/')}/bot{bot_token}/sendMessage"
+        self.max_concurrency = max_concurrency or settings.telegram_max_concurrency
+        self.max_retries = settings.telegram_max_retries if max_retries is None else max_retries
+        self.timeout = timeout or settings.telegram_timeout_seconds
+        self.per_chat_interval = per_chat_interval
+        self._global = _Pacer(global_interval)
+        self._chats: dict[str, _Pacer] = {}
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._client: httpx.AsyncClient | None = None
+
+    async def __aenter__(self):
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency,
+            ),
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._client.aclose()
+        self._client = None
+
+    def _chat_pacer(self, chat_id: str) -> _Pacer:
+        pacer = self._chats.get(chat_id)
+        if pacer is None:
+            pacer = self._chats[chat_id] = _Pacer(self.per_chat_interval)
+        return pacer
+
+    async def send(self, chat_id: str, text: str) -> tuple[bool, str]:
+        chat = self._chat_pacer(chat_id)
+        error = ""
+        for attempt in range(self.max_retries + 1):
+            while True:
+                await chat.wait()
+                await self._global.wait()
+                async with self._semaphore:
+                    # A 429 may have arrived while this send was queued:
+                    # check right before posting and queue again if so.
+                    blocked = max(chat.blocked_until, self._global.blocked_until) - time.monotonic()
+                    if blocked <= 0:
+                        try:
+                            r = await self._client.post(self.url, json={"chat_id": chat_id, "text": text})
+                        except httpx.HTTPError as e:
+                            error = str(e) or type(e).__name__
+                            r = None
+                        break
+                await asyncio.sleep(blocked)
+            if r is not None:
+                if r.status_code == 200:
+                    return True, ""
+                error = r.text or f"HTTP {r.status_code}"
+                if r.status_code == 429:
+                    # Flood control applies to the bot as a whole: pause
+                    # every pending send, not just this chat.
+                    retry_after = _retry_after(r)
+                    chat.block(retry_after)
+                    self._global.block(retry_after)
+                    continue
+                if r.status_code < 500:
+                    return False, error
+            if attempt < self.max_retries:
+                # Transient failure: exponential backoff with jitter.
+                await asyncio.sleep(0.5 * 2 ** attempt * (1 + random.random()))
+        return False, error
+
+    async def send_many(self, messages: list[tuple[str, str]]) -> list[tuple[bool, str]]:
+        """Send (chat_id, text) pairs concurrently; results keep input order."""
+        return list(await asyncio.gather(*(self.send(cid, text) for cid, text in messages)))
+
+
+def _retry_after(r: httpx.Response) -> float:
+    try:
+        return float(r.json()["parameters"]["retry_after"])
+    except Exception:
+        return float(r.headers.get("Retry-After") or 1)
+
+
+def send_telegram_batch(messages: list[tuple[str, str]], bot_token: str) -> list[tuple[bool, str]]:
+    """Blocking wrapper around TelegramDelivery.send_many for worker threads."""
+
+    async def _run():
+        async with TelegramDelivery(bot_token) as delivery:
+            return await delivery.send_many(messages)
+
+    return asyncio.run(_run())
@@ -1,17 +1,28 @@
-"""Create tables and optional default admin user."""
+"""Apply database migrations and create the optional default admin user."""
 import os
 import sys
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
 
-from app.database import engine, Base
-from app.models import User, Category, Subscription, Notification, Setting
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+
+from app.database import engine
 from app.core.security import get_password_hash
 
 
 def init_db():
-    Base.metadata.create_all(bind=engine)
-    print("Tables created.")
+    cfg = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    tables = inspect(engine).get_table_names()
+    if "subscriptions" in tables and "alembic_version" not in tables:
+        # Database created by the old create_all-based script: adopt it as the
+        # initial revision so only the newer migrations run.
+        command.stamp(cfg, "0001")
+        print("Existing schema stamped as revision 0001.")
+    command.upgrade(cfg, "head")
+    print("Database migrated to head.")
 
 
 def create_admin():
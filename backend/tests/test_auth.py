@@ -0,0 +1,146 @@
+"""Auth: tokens are bound to the password they were issued for; login throughput."""
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from passlib.context import CryptContext
+from sqlalchemy import select
+
+from app.config import Settings, settings
+from app.core import security
+from app.core.deps import _user_cache, get_current_user
+from app.core.hashing import HashingExecutor
+from app.core.security import get_password_hash
+from app.models.user import User
+from app.routers import system
+from app.routers.auth import change_password, login
+from app.schemas.auth import LoginRequest, PasswordChangeRequest
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def admin(db):
+    _user_cache.clear()
+    db.add(User(username="admin", password_hash=get_password_hash("admin")))
+    await db.commit()
+    yield
+    _user_cache.clear()
+
+
+def _bearer(token: str) -> HTTPAuthorizationCredentials:
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+async def test_login_token_authenticates(admin, db):
+    token = (await login(LoginRequest(username="admin", password="admin"), db)).access_token
+    user = await get_current_user(_bearer(token))
+    assert user.username == "admin"
+
+
+async def test_wrong_password_is_rejected(admin, db):
+    with pytest.raises(HTTPException) as exc:
+        await login(LoginRequest(username="admin", password="nope"), db)
+    assert exc.value.status_code == 401
+
+
+async def test_password_change_revokes_earlier_tokens(admin, db):
+    old_token = (await login(LoginRequest(username="admin", password="admin"), db)).access_token
+    current = await get_current_user(_bearer(old_token))
+    result = await change_password(PasswordChangeRequest(old_password="admin", new_password="s3cret!"), current, db)
+
+    with pytest.raises(HTTPException) as exc:
+        await get_current_user(_bearer(old_token))
+    assert exc.value.status_code == 401
+    assert (await get_current_user(_bearer(result["access_token"]))).username == "admin"
+    new_token = (await login(LoginRequest(username="admin", password="s3cret!"), db)).access_token
+    assert (await get_current_user(_bearer(new_token))).username == "admin"
+    assert await db.scalar(select(User.username)) == "admin"
+
+
+async def test_no_connection_held_while_hashing(admin, db, async_engine, monkeypatch):
+    from app.routers import auth
+
+    checked_out = []
+
+    async def verify(plain, hashed):
+        checked_out.append(async_engine.sync_engine.pool.checkedout())
+        return await security.verify_and_update_password(plain, hashed)
+
+    async def hash_(password):
+        checked_out.append(async_engine.sync_engine.pool.checkedout())
+        return await security.hash_password(password)
+
+    monkeypatch.setattr(auth, "verify_and_update_password", verify)
+    monkeypatch.setattr(auth, "hash_password", hash_)
+    token = (await login(LoginRequest(username="admin", password="admin"), db)).access_token
+    current = await get_current_user(_bearer(token))
+    await change_password(PasswordChangeRequest(old_password="admin", new_password="s3cret!"), current, db)
+    assert checked_out and set(checked_out) == {0}
+
+
+async def test_outdated_hash_is_upgraded_on_login(db):
+    from app.core.security import pwd_context
+
+    _user_cache.clear()
+    db.add(User(username="legacy", password_hash=pwd_context.hash("pw", rounds=5)))
+    await db.commit()
+    token = (await login(LoginRequest(username="legacy", password="pw"), db)).access_token
+    stored = await db.scalar(select(User.password_hash).where(User.username == "legacy"))
+    assert not pwd_context.needs_update(stored)
+    assert (await get_current_user(_bearer(token))).username == "legacy"
+    _user_cache.clear()
+
+
+async def test_token_returned_by_password_change_authenticates(client):
+    old = dict(client.headers)
+    response = await client.put("/api/auth/password", json={"old_password": "admin", "new_password": "s3cret!"})
+    assert response.status_code == 200
+    new_token = response.json()["access_token"]
+    assert (await client.get("/api/auth/me", headers=old)).status_code == 401
+    me = await client.get("/api/auth/me", headers={"Authorization": f"Bearer {new_token}"})
+    assert me.status_code == 200
+    assert me.json()["username"] == "admin"
+
+
+# The production default, not the test suite's BCRYPT_ROUNDS=4.
+BENCH_ROUNDS = Settings.model_fields["bcrypt_rounds"].default
+
+
+async def _login_burst(client, logins: int) -> tuple[float, int]:
+    """(seconds, 503 count) for `logins` concurrent /auth/login calls."""
+    async def one():
+        r = await client.post("/api/auth/login", json={"username": "bench", "password": "pw"})
+        assert r.status_code in (200, 503), r.text
+        return r.status_code
+
+    t0 = time.perf_counter()
+    codes = await asyncio.gather(*(one() for _ in range(logins)))
+    return time.perf_counter() - t0, codes.count(503)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("workers", [1, 2, 4, 8])
+async def test_login_throughput(workers, client, db, monkeypatch, capsys):
+    context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BENCH_ROUNDS)
+    db.add(User(username="bench", password_hash=context.hash("pw")))
+    await db.commit()
+    monkeypatch.setattr(security, "pwd_context", context)
+    max_pending = settings.password_hash_max_pending
+    for logins in (max_pending, 2 * max_pending):
+        executor = HashingExecutor(workers, max_pending)
+        monkeypatch.setattr(security, "hashing_executor", executor)
+        monkeypatch.setattr(system, "hashing_executor", executor)
+        elapsed, rejected = await _login_burst(client, logins)
+        stats = (await client.get("/api/system/hashing")).json()
+        assert stats["completed"] == logins - rejected
+        assert stats["rejected"] == rejected
+        with capsys.disabled():
+            print(
+                f"\n{logins} concurrent logins, bcrypt cost {BENCH_ROUNDS}, {workers} workers: "
+                f"{(logins - rejected) / elapsed:.1f} logins/s, {rejected} rejected (503), "
+                f"queue wait mean {stats['queue_seconds_sum'] / stats['completed'] * 1000:.0f} ms, "
+                f"max {stats['queue_seconds_max'] * 1000:.0f} ms"
+            )
@@ -0,0 +1,147 @@
+"""Calendar engine: multi-month projection, category colors and the month cache."""
+import uuid
+from calendar import monthrange
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from app.models.category import Category
+from app.models.subscription import Subscription
+from app.services import calendar_engine
+from app.services.calendar_engine import DEFAULT_COLOR, calendar_days
+from app.services.data_version import bump_data_version
+from app.services.renewal import next_renewal, renewal_day
+
+pytestmark = pytest.mark.anyio
+
+MONTHS = 14
+
+
+def _subscription(name: str, billing_cycle: str, expire_date: date, **extra) -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "name": name,
+        "cost": 1,
+        "currency": "CNY",
+        "billing_cycle": billing_cycle,
+        "expire_date": expire_date,
+        "status": "active",
+        "category_id": None,
+        "start_date": None,
+        **extra,
+    }
+
+
+def _short_month_end(after: date) -> date:
+    """Last day of the first month after `after` with fewer than 31 days."""
+    year, month = after.year, after.month
+    while True:
+        year, month = (year, month + 1) if month < 12 else (year + 1, 1)
+        if monthrange(year, month)[1] < 31:
+            return date(year, month, monthrange(year, month)[1])
+
+
+def _entries(days: list[dict]) -> set[tuple]:
+    return {
+        (day["date"], sub_id, left, projected)
+        for day in days
+        for sub_id, left, projected in zip(day["service_ids"], day["days_left"], day["projected"])
+    }
+
+
+def _expected(sub: dict, today: date, end: date) -> set[tuple]:
+    """Renewals stepped one at a time with next_renewal."""
+    expire = sub["expire_date"]
+    day = renewal_day(expire, sub["start_date"])
+    out = set()
+    when, projected = expire, False
+    while when <= end:
+        out.add((when.isoformat(), str(sub["id"]), (when - today).days, projected))
+        if expire < today:
+            break
+        when, projected = next_renewal(when, sub["billing_cycle"], day), True
+    return out
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    # Every test database starts at data version "0": keys would collide.
+    calendar_engine._month_cache.clear()
+    yield
+    calendar_engine._month_cache.clear()
+
+
+@pytest.fixture
+def range_bounds():
+    today = date.today()
+    year, month0 = divmod(today.year * 12 + today.month - 1 + MONTHS - 1, 12)
+    return today, date(year, month0 + 1, monthrange(year, month0 + 1)[1])
+
+
+async def test_projection_matches_next_renewal(db, sync_engine, range_bounds):
+    today, end = range_bounds
+    category = {"id": uuid.uuid4(), "name": "video", "color": "#FF0000"}
+    subs = [
+        _subscription("monthly", "monthly", today + timedelta(days=10), category_id=category["id"]),
+        # Month-end series started on the 31st.
+        _subscription("month-end", "monthly", _short_month_end(today), start_date=date(2020, 1, 31)),
+        _subscription("yearly", "yearly", today + timedelta(days=20)),
+        _subscription("fortnightly", "14d", today + timedelta(days=5)),
+        # Expired: shown on its expire_date only.
+        _subscription("lapsed", "monthly", today - timedelta(days=1)),
+    ]
+    with sync_engine.begin() as conn:
+        conn.execute(insert(Category), [category])
+        conn.execute(insert(Subscription), subs)
+
+    days = await calendar_days(db, today.year, today.month, MONTHS)
+    first = date(today.year, today.month, 1)
+    assert [d["date"] for d in days] == [(first + timedelta(days=i)).isoformat() for i in range((end - first).days + 1)]
+    for sub in subs:
+        got = {e for e in _entries(days) if e[1] == str(sub["id"])}
+        assert got == _expected(sub, today, end), sub["name"]
+
+    colors = {
+        sub_id: color
+        for day in days
+        for sub_id, color in zip(day["service_ids"], day["category_colors"])
+    }
+    assert colors[str(subs[0]["id"])] == "#FF0000"
+    assert colors[str(subs[2]["id"])] == DEFAULT_COLOR
+
+
+async def test_split_requests_match_one_range(db, sync_engine, range_bounds):
+    today, _ = range_bounds
+    subs = [_subscription(f"s{i}", cycle, today + timedelta(days=3 * i))
+            for i, cycle in enumerate(["monthly", "quarterly", "2w", "yearly", "6m"])]
+    with sync_engine.begin() as conn:
+        conn.execute(insert(Subscription), subs)
+    whole = await calendar_days(db, today.year, today.month, 6)
+    calendar_engine._month_cache.clear()
+    parts = []
+    for i in range(6):
+        year, month0 = divmod(today.year * 12 + today.month - 1 + i, 12)
+        parts += await calendar_days(db, year, month0 + 1)
+    assert parts == whole
+
+
+async def test_months_are_cached_until_the_data_version_changes(db, sync_engine, range_bounds):
+    today, _ = range_bounds
+    first = _subscription("first", "monthly", today + timedelta(days=1))
+    with sync_engine.begin() as conn:
+        conn.execute(insert(Subscription), [first])
+    before = await calendar_days(db, today.year, today.month, 2)
+    hits = calendar_engine.calendar_cache_stats()["hits"]
+
+    # A write that does not bump the version is not seen: the months are cached.
+    second = _subscription("second", "monthly", today + timedelta(days=2))
+    with sync_engine.begin() as conn:
+        conn.execute(insert(Subscription), [second])
+    assert await calendar_days(db, today.year, today.month, 2) == before
+    assert calendar_engine.calendar_cache_stats()["hits"] == hits + 2
+
+    await bump_data_version(db)
+    await db.commit()
+    after = await calendar_days(db, today.year, today.month, 2)
+    assert str(second["id"]) in {e[1] for e in _entries(after)}
@@ -0,0 +1,44 @@
+"""Categories: subscription counts come from one query, however many categories."""
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import insert
+
+from app.models.category import Category
+from app.models.subscription import Subscription
+from app.routers.categories import list_categories
+
+pytestmark = pytest.mark.anyio
+
+
+def _seed(sync_engine, categories: int, per_category: int = 3) -> None:
+    cats = [{"id": uuid.uuid4(), "name": f"c{i}", "color": "#4382FF", "sort_order": i} for i in range(categories)]
+    subs = [
+        {
+            "id": uuid.uuid4(),
+            "name": f"s{i}-{j}",
+            "category_id": cat["id"],
+            "cost": Decimal("9.90"),
+            "currency": "CNY",
+            "billing_cycle": "monthly",
+            "expire_date": date(2030, 1, 1),
+            "status": "active",
+        }
+        for i, cat in enumerate(cats)
+        for j in range(per_category)
+    ]
+    with sync_engine.begin() as conn:
+        conn.execute(insert(Category), cats)
+        conn.execute(insert(Subscription), subs)
+
+
+@pytest.mark.parametrize("categories", [1, 10, 50])
+async def test_list_categories_statement_count_is_constant(categories, sync_engine, async_engine, db, count_statements):
+    _seed(sync_engine, categories)
+    with count_statements(async_engine.sync_engine) as statements:
+        result = await list_categories(db=db, current_user=None)
+    assert len(result) == categories
+    assert all(c.service_count == 3 for c in result)
+    assert len(statements) == 1
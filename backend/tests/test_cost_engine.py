@@ -0,0 +1,142 @@
+"""Cost engine: exact Decimal arithmetic and agreement with brute force."""
+import random
+import time
+from calendar import monthrange
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.services.cost_engine import (
+    RateTable,
+    build_rate_table,
+    monthly_series,
+    normalize,
+    payment_series,
+    quantize,
+)
+from app.services.renewal import cycle_length_months, occurrences
+
+CYCLES = ["monthly", "quarterly", "yearly", "6m", "14d", "2w", "bogus"]
+CURRENCIES = ["CNY", "USD", "EUR"]
+
+
+def _rows(n: int, seed: int = 0, base: date = date(2026, 10, 18)):
+    rnd = random.Random(seed)
+    costs, currencies, cycles, starts, expires = [], [], [], [], []
+    for _ in range(n):
+        expire = base + timedelta(days=rnd.randint(-500, 500))
+        costs.append(Decimal(rnd.randint(1, 99_999)) / 100)
+        currencies.append(rnd.choice(CURRENCIES))
+        cycles.append(rnd.choice(CYCLES))
+        starts.append(expire - timedelta(days=rnd.randint(0, 900)) if rnd.random() < 0.8 else None)
+        expires.append(expire)
+    return costs, currencies, cycles, starts, expires
+
+
+def _months(first: date, n: int) -> tuple[list[date], list[date]]:
+    starts, ends = [], []
+    for i in range(n):
+        y, m0 = divmod(first.year * 12 + first.month - 1 + i, 12)
+        starts.append(date(y, m0 + 1, 1))
+        ends.append(date(y, m0 + 1, monthrange(y, m0 + 1)[1]))
+    return starts, ends
+
+
+def test_normalize_is_exact():
+    assert normalize({("CNY", "quarterly"): Decimal("30.00")}) == {"CNY": Decimal(10)}
+    # Ten 0.10 subscriptions are exactly 1.00; the float sum is not.
+    assert normalize({("CNY", "monthly"): sum([Decimal("0.10")] * 10)}) == {"CNY": Decimal(1)}
+    assert sum([0.1] * 10) != 1.0
+    assert normalize({("CNY", "yearly"): Decimal("120.00")}, period_months=12) == {"CNY": Decimal("120")}
+    monthly = normalize({("USD", "monthly"): Decimal("9.99") * 1_000_000, ("USD", "yearly"): Decimal("12")})
+    assert monthly == {"USD": Decimal("9990001")}
+
+
+def test_quantize_rounds_half_up():
+    assert quantize(Decimal("0.005")) == Decimal("0.01")
+    assert quantize(Decimal("2.675")) == Decimal("2.68")
+    assert quantize(Decimal(10) / 3) == Decimal("3.33")
+
+
+def test_rate_table_converts_through_the_pivot():
+    rates = RateTable({"CNY": Decimal(1), "USD": Decimal("7.2"), "EUR": Decimal("7.8")}, "USD")
+    assert rates.convert(Decimal("72"), "CNY") == Decimal("10")
+    assert rates.convert(Decimal("7.2"), "USD", "CNY") == Decimal("51.84")
+    assert rates.convert(Decimal("1"), "JPY") is None
+    total, missing = rates.total({"CNY": Decimal("72"), "USD": Decimal("1"), "JPY": Decimal("100")})
+    assert total == Decimal("11")
+    assert missing == ["JPY"]
+
+
+def test_build_rate_table_skips_invalid_rates():
+    rates = build_rate_table("7.1", {"eur": "7.8", "GBP": "-1", "JPY": "abc", "CNY": "2"}, None)
+    assert rates.rates == {"CNY": Decimal(1), "USD": Decimal("7.1"), "EUR": Decimal("7.8")}
+    assert rates.base == "CNY"
+    assert build_rate_table(None, None, "USD").rates["USD"] == Decimal("7.2")
+
+
+def test_monthly_series_matches_brute_force():
+    costs, currencies, cycles, starts, expires = _rows(2000)
+    month_starts, month_ends = _months(date(2025, 11, 1), 24)
+    series = monthly_series(costs, currencies, cycles, starts, expires, month_starts, month_ends)
+    for i, (month_start, month_end) in enumerate(zip(month_starts, month_ends)):
+        expected: dict[str, Decimal] = defaultdict(Decimal)
+        for cost, currency, cycle, start, expire in zip(costs, currencies, cycles, starts, expires):
+            if expire >= month_start and (start is None or start <= month_end):
+                expected[currency] += cost / cycle_length_months(cycle)
+        for currency in CURRENCIES:
+            assert quantize(series[currency][i]) == quantize(expected[currency]), (currency, month_start)
+
+
+def test_payment_series_matches_occurrences():
+    costs, currencies, cycles, _, expires = _rows(2000, seed=1)
+    start, months = date(2026, 10, 18), 36
+    keys = [i % 5 for i in range(len(costs))]
+    counts = [1] * len(costs)
+    amounts, payments = payment_series(costs, counts, currencies, keys, cycles, expires, start, months)
+    end = _months(start, months)[1][-1]
+    expected: dict[tuple, list[Decimal]] = defaultdict(lambda: [Decimal(0)] * months)
+    expected_payments = [0] * months
+    base = start.year * 12 + start.month
+    for cost, currency, key, cycle, expire in zip(costs, currencies, keys, cycles, expires):
+        for _, when in occurrences(expire, cycle, start, end):
+            i = when.year * 12 + when.month - base
+            expected[(currency, key)][i] += cost
+            expected_payments[i] += 1
+    assert payments == expected_payments
+    assert {k: v for k, v in amounts.items() if any(v)} == dict(expected)
+
+
+@pytest.mark.benchmark
+def test_cost_engine_one_million_rows(report):
+    n = 1_000_000
+    costs, currencies, cycles, starts, expires = _rows(n)
+    month_starts, month_ends = _months(date(2025, 11, 1), 12)
+
+    t0 = time.perf_counter()
+    previous: dict[str, Decimal] = defaultdict(Decimal)
+    for cost, currency, cycle in zip(costs, currencies, cycles):
+        previous[currency] += cost / cycle_length_months(cycle)
+    old = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    sums: dict[tuple[str, str], Decimal] = defaultdict(Decimal)
+    for cost, currency, cycle in zip(costs, currencies, cycles):
+        sums[currency, cycle] += cost
+    current = normalize(sums)
+    new = time.perf_counter() - t0
+    assert {c: quantize(a) for c, a in current.items()} == {c: quantize(a) for c, a in previous.items()}
+    report("normalize, 1M rows (per-row division vs grouped)", old, new)
+
+    t0 = time.perf_counter()
+    for month_start, month_end in zip(month_starts, month_ends):
+        for cost, cycle, start, expire in zip(costs, cycles, starts, expires):
+            if expire >= month_start and (start is None or start <= month_end):
+                cost / cycle_length_months(cycle)
+    old = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    monthly_series(costs, currencies, cycles, starts, expires, month_starts, month_ends)
+    new = time.perf_counter() - t0
+    report("12-month series, 1M rows (per-month scan vs difference array)", old, new)
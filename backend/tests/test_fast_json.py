@@ -0,0 +1,93 @@
+"""List serialization: row tuples + orjson against pydantic models + dump_json."""
+import random
+import time
+import uuid
+from datetime import date, timedelta
+from decimal import Decimal
+
+import orjson
+import pytest
+from pydantic import TypeAdapter
+
+from app.routers.subscriptions import _LIST_KEYS, _rows_to_items
+from app.schemas.subscription import SubscriptionResponse
+from app.services.fast_json import dumps
+from app.services.subscription_status import compute_status
+
+_MODELS = TypeAdapter(list[SubscriptionResponse])
+
+
+def _rows(n: int, seed: int = 0) -> list[tuple]:
+    """Tuples shaped like the list endpoint's SELECT (_LIST_COLUMNS + status)."""
+    rnd = random.Random(seed)
+    today = date.today()
+    rows = []
+    for i in range(n):
+        expire = today + timedelta(days=rnd.randint(-400, 400))
+        rows.append((
+            uuid.UUID(int=rnd.getrandbits(128)),
+            f"service {i}",
+            uuid.UUID(int=rnd.getrandbits(128)) if rnd.random() < 0.7 else None,
+            rnd.choice([None, "provider"]),
+            Decimal(rnd.randint(100, 99_999)) / 100,
+            rnd.choice(["CNY", "USD"]),
+            rnd.choice(["monthly", "yearly", "14d"]),
+            expire - timedelta(days=rnd.randint(30, 900)) if rnd.random() < 0.8 else None,
+            expire,
+            rnd.choice([None, "notes"]),
+            None,
+            rnd.choice([None, [7, 1], []]),
+            compute_status(expire, today),
+        ))
+    return rows
+
+
+def _models(rows: list[tuple]) -> list[SubscriptionResponse]:
+    """One SubscriptionResponse per row, as _sub_to_response builds them."""
+    models = []
+    for row in rows:
+        fields = dict(zip(_LIST_KEYS, row))
+        if fields["notify_days"] is None:
+            fields["notify_days"] = [7, 3, 1]
+        models.append(SubscriptionResponse(**fields))
+    return models
+
+
+def _via_models(rows: list[tuple]) -> bytes:
+    """The previous path: pydantic models, then dump_json."""
+    return _MODELS.dump_json(_models(rows))
+
+
+def _via_rows(rows: list[tuple]) -> bytes:
+    return dumps(_rows_to_items(rows))
+
+
+def test_row_path_matches_pydantic_output():
+    rows = _rows(500)
+    assert orjson.loads(_via_rows(rows)) == orjson.loads(_via_models(rows))
+
+
+def _per_row_us(fn, arg, n: int) -> float:
+    """Best of three runs, in microseconds per row."""
+    best = float("inf")
+    for _ in range(3):
+        t0 = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - t0)
+    return best / n * 1e6
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("n", [1_000, 10_000, 100_000])
+def test_serialization_cost_per_row(n, capsys):
+    rows = _rows(n)
+    models = _models(rows)
+    items = _rows_to_items(rows)
+    timings = {
+        "models + dump_json": _per_row_us(_via_models, rows, n),
+        "dump_json only": _per_row_us(_MODELS.dump_json, models, n),
+        "rows_to_dicts + orjson": _per_row_us(_via_rows, rows, n),
+        "orjson only": _per_row_us(dumps, items, n),
+    }
+    with capsys.disabled():
+        print(f"\nserialization, {n} rows (us/row): " + ", ".join(f"{k} {v:.2f}" for k, v in timings.items()))
@@ -0,0 +1,178 @@
+"""Load: the async handlers against the previous sync ones at 200 concurrent clients.
+
+The previous handlers are the pre-port `def` versions of /auth/me,
+/stats/overview and /subscriptions, run by Starlette on its threadpool with
+the sync engine. Both apps share one SQLite database, so the comparison is of
+the request path (threadpool vs event loop), not of Postgres drivers.
+
+Both apps get a connection pool as large as the client count, so neither
+waits on the pool. (With the configured 5 + 10 the previous app deadlocks
+under this load: every threadpool thread waits for a connection that only a
+threadpool thread can release, as get_db's teardown needs one too.)
+"""
+import asyncio
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI, HTTPException, Response
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import case, create_engine, func
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import database
+from app.core.deps import security
+from app.core.security import decode_access_token
+from app.main import app
+from app.models.subscription import Subscription
+from app.models.user import User
+from app.routers.subscriptions import _sub_to_response
+from app.schemas.auth import UserResponse
+from app.schemas.stats import OverviewStats
+from app.schemas.subscription import SubscriptionResponse
+from app.services import response_cache
+from app.services.subscription_status import EXPIRING_SOON_DAYS
+from app.services.ttl_cache import TTLCache
+
+pytestmark = [pytest.mark.anyio, pytest.mark.benchmark]
+
+CLIENTS = 200
+REQUESTS = 2_000
+ENDPOINTS = ["/api/auth/me", "/api/stats/overview", "/api/subscriptions?limit=50"]
+
+
+def previous_app(engine) -> FastAPI:
+    """The three endpoints as they were before the async port, on engine."""
+    previous = FastAPI()
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def get_current_user(
+        db: Session = Depends(get_db),
+        credentials: HTTPAuthorizationCredentials | None = Depends(security),
+    ) -> User:
+        claims = decode_access_token(credentials.credentials) if credentials else None
+        user = db.query(User).filter(User.username == claims[0]).first() if claims else None
+        if not user:
+            raise HTTPException(status_code=401, detail="Invalid or expired token")
+        return user
+
+    @previous.get("/api/auth/me", response_model=UserResponse)
+    def me(current_user: User = Depends(get_current_user)):
+        return current_user
+
+    @previous.get("/api/stats/overview", response_model=OverviewStats)
+    def get_overview(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+        today = date.today()
+        end_of_month = (today.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+        active_from = today + timedelta(days=EXPIRING_SOON_DAYS + 1)
+        monthly_cost = case(
+            (Subscription.billing_cycle == "yearly", Subscription.cost / 12),
+            (Subscription.billing_cycle == "quarterly", Subscription.cost / 3),
+            else_=Subscription.cost,
+        )
+        rows = db.query(
+            Subscription.currency,
+            func.count(Subscription.id),
+            func.count(Subscription.id).filter(
+                Subscription.expire_date >= today,
+                Subscription.expire_date <= end_of_month,
+            ),
+            func.count(Subscription.id).filter(Subscription.expire_date >= active_from),
+            func.sum(monthly_cost).filter(Subscription.expire_date >= today),
+        ).group_by(Subscription.currency).all()
+        total = expiring_this_month = active = 0
+        monthly_cny = monthly_usd = Decimal("0")
+        by_currency: dict[str, Decimal] = {}
+        for currency, count, expiring, active_count, monthly in rows:
+            monthly = Decimal(monthly or 0)
+            total += count
+            expiring_this_month += expiring
+            active += active_count
+            by_currency[currency] = round(monthly, 2)
+            if currency == "CNY":
+                monthly_cny += monthly
+            else:
+                monthly_usd += monthly
+        return OverviewStats(
+            total_services=total,
+            expiring_this_month=expiring_this_month,
+            monthly_expense_cny=round(monthly_cny, 2),
+            monthly_expense_usd=round(monthly_usd, 2),
+            active_services=active,
+            monthly_expense_by_currency=by_currency,
+        )
+
+    @previous.get("/api/subscriptions", response_model=list[SubscriptionResponse])
+    def list_subscriptions(
+        response: Response,
+        limit: int = 50,
+        db: Session = Depends(get_db),
+        current_user: User = Depends(get_current_user),
+    ):
+        q = db.query(Subscription).order_by(Subscription.expire_date, Subscription.id)
+        subs = q.limit(limit + 1).all()
+        if len(subs) > limit:
+            subs = subs[:limit]
+            response.headers["X-Next-Cursor"] = "next"
+        return [_sub_to_response(s) for s in subs]
+
+    return previous
+
+
+async def _load(target: FastAPI, headers: dict, path: str) -> tuple[float, float]:
+    """(requests per second, p99 latency in seconds) for REQUESTS calls by CLIENTS clients."""
+    latencies: list[float] = []
+    remaining = iter(range(REQUESTS))
+
+    async def run_client(client: httpx.AsyncClient):
+        for _ in remaining:
+            t0 = time.perf_counter()
+            response = await client.get(path)
+            latencies.append(time.perf_counter() - t0)
+            assert response.status_code == 200, response.text
+
+    transport = httpx.ASGITransport(app=target)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", headers=headers) as client:
+        await client.get(path)  # warm up
+        t0 = time.perf_counter()
+        await asyncio.gather(*(run_client(client) for _ in range(CLIENTS)))
+        elapsed = time.perf_counter() - t0
+    latencies.sort()
+    return REQUESTS / elapsed, latencies[int(len(latencies) * 0.99) - 1]
+
+
+@pytest.mark.parametrize("path", ENDPOINTS)
+async def test_async_port_under_load(
+    path, client, sync_engine, async_engine, seed_subscriptions, monkeypatch, capsys
+):
+    seed_subscriptions(1_000)
+    # Measure the handlers, not the stats response cache in front of them.
+    monkeypatch.setattr(response_cache, "_responses", TTLCache(0))
+    headers = dict(client.headers)
+    engine = create_engine(sync_engine.url, pool_size=CLIENTS)
+    try:
+        old_rps, old_p99 = await _load(previous_app(engine), headers, path)
+    finally:
+        engine.dispose()
+    engine = create_async_engine(async_engine.url, pool_size=CLIENTS)
+    database.AsyncSessionLocal.configure(bind=engine)
+    try:
+        new_rps, new_p99 = await _load(app, headers, path)
+    finally:
+        database.AsyncSessionLocal.configure(bind=async_engine)
+        await engine.dispose()
+    with capsys.disabled():
+        print(
+            f"\n{path}, {CLIENTS} clients: previous {old_rps:.0f} req/s p99 {old_p99 * 1000:.1f} ms, "
+            f"current {new_rps:.0f} req/s p99 {new_p99 * 1000:.1f} ms"
+        )
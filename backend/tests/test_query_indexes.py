@@ -0,0 +1,102 @@
+"""The planner uses the indexes from migration 0002 (Postgres only)."""
+import importlib.util
+import random
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from sqlalchemy import insert, text
+
+from app.models.category import Category
+from app.models.notification import Notification
+from app.models.subscription import Subscription
+
+MIGRATION = Path(__file__).resolve().parents[1] / "alembic" / "versions" / "0002_query_indexes.py"
+
+# Each index from the migration with a query of the access path it serves.
+QUERIES = {
+    "ix_subscriptions_expire_date_id": (
+        "SELECT id FROM subscriptions WHERE expire_date BETWEEN :start AND :end "
+        "ORDER BY expire_date, id LIMIT 50"
+    ),
+    "ix_subscriptions_category_id_expire_date": (
+        "SELECT id FROM subscriptions WHERE category_id = :category_id ORDER BY expire_date, id LIMIT 50"
+    ),
+    "ix_subscriptions_start_date": "SELECT id FROM subscriptions WHERE start_date <= :start",
+    "ix_notifications_sent_at": "SELECT id FROM notifications ORDER BY sent_at DESC LIMIT 50",
+    "ix_notifications_subscription_id": "SELECT id FROM notifications WHERE subscription_id = :subscription_id",
+}
+
+
+def _migration_indexes() -> list[str]:
+    spec = importlib.util.spec_from_file_location("migration_0002", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return [name for name, _, _ in module.INDEXES]
+
+
+@pytest.fixture
+def seeded(pg_engine):
+    rnd = random.Random(0)
+    today = date.today()
+    categories = [{"id": uuid.uuid4(), "name": f"c{i}"} for i in range(20)]
+    subscriptions = [
+        {
+            "id": uuid.uuid4(),
+            "name": f"s{i}",
+            "category_id": rnd.choice(categories)["id"],
+            "cost": 10,
+            "currency": "CNY",
+            "billing_cycle": "monthly",
+            "start_date": today - timedelta(days=rnd.randint(0, 3000)),
+            "expire_date": today + timedelta(days=rnd.randint(-365, 365)),
+            "status": "active",
+        }
+        for i in range(5000)
+    ]
+    now = datetime.now(timezone.utc)
+    notifications = [
+        {
+            "id": uuid.uuid4(),
+            "subscription_id": sub["id"],
+            "notify_type": "expire",
+            "target_date": sub["expire_date"],
+            "sent_at": now - timedelta(minutes=i),
+            "success": True,
+        }
+        for i, sub in enumerate(subscriptions)
+    ]
+    with pg_engine.begin() as conn:
+        conn.execute(insert(Category), categories)
+        conn.execute(insert(Subscription), subscriptions)
+        conn.execute(insert(Notification), notifications)
+    with pg_engine.connect() as conn:
+        conn.execute(text("ANALYZE"))
+        conn.commit()
+    return {
+        "start": today,
+        "end": today + timedelta(days=7),
+        "category_id": categories[0]["id"],
+        "subscription_id": subscriptions[0]["id"],
+    }
+
+
+def test_every_migration_index_is_covered():
+    assert sorted(QUERIES) == sorted(_migration_indexes())
+
+
+@pytest.mark.postgres
+@pytest.mark.parametrize("index", sorted(QUERIES))
+def test_planner_uses_index(index, pg_engine, seeded):
+    sql = QUERIES[index]
+    params = {k: v for k, v in seeded.items() if f":{k}" in sql}
+    if "start_date" in sql:
+        # Selective enough for the index.
+        params["start"] = date.today() - timedelta(days=2950)
+    with pg_engine.connect() as conn:
+        # Small tables favour sequential scans; the question is whether the
+        # index is usable for the access path, not whether it beats a seq scan.
+        conn.execute(text("SET enable_seqscan = off"))
+        plan = "\n".join(row[0] for row in conn.execute(text(f"EXPLAIN {sql}"), params))
+    assert index in plan, plan
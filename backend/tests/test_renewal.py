@@ -0,0 +1,190 @@
+"""Renewal engine: randomized property checks against brute force."""
+import random
+import time
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.models.subscription import Subscription
+from app.services.renewal import (
+    NAMED_CYCLES,
+    _days_in_month,
+    add_cycles,
+    next_renewal,
+    next_renewal_expr,
+    occurrences,
+    parse_cycle,
+    renewal_dates,
+    renewal_day,
+)
+
+CYCLES = list(NAMED_CYCLES) + ["1m", "2m", "6m", "2y", "1d", "14d", "2w", "bogus", None]
+EXAMPLES = 2000
+
+
+def _random_date(rnd: random.Random) -> date:
+    return date(2000, 1, 1) + timedelta(days=rnd.randint(0, 365 * 40))
+
+
+def _month_end_date(rnd: random.Random) -> date:
+    year, month = rnd.randint(1999, 2040), rnd.randint(1, 12)
+    return date(year, month, rnd.randint(28, _days_in_month(year, month)))
+
+
+@pytest.mark.parametrize("billing_cycle, months, days", [
+    ("monthly", 1, 0), ("quarterly", 3, 0), ("yearly", 12, 0),
+    ("6m", 6, 0), ("2y", 24, 0), ("14d", 0, 14), ("2w", 0, 14), ("bogus", 1, 0), (None, 1, 0), ("0d", 1, 0),
+])
+def test_parse_cycle(billing_cycle, months, days):
+    cycle = parse_cycle(billing_cycle)
+    assert (cycle.months, cycle.days) == (months, days)
+
+
+def test_month_end_clamping():
+    rnd = random.Random(1)
+    for _ in range(EXAMPLES):
+        anchor = _month_end_date(rnd)
+        cycle = parse_cycle(rnd.choice(["monthly", "quarterly", "yearly", "2m"]))
+        k = rnd.randint(-30, 30)
+        result = add_cycles(anchor, cycle, k)
+        year, month0 = divmod(anchor.year * 12 + anchor.month - 1 + cycle.months * k, 12)
+        assert (result.year, result.month) == (year, month0 + 1)
+        assert result.day == min(anchor.day, _days_in_month(result.year, result.month))
+
+
+def test_known_month_end_series():
+    assert [add_cycles(date(2025, 1, 31), parse_cycle("monthly"), k) for k in range(1, 5)] == [
+        date(2025, 2, 28), date(2025, 3, 31), date(2025, 4, 30), date(2025, 5, 31),
+    ]
+    assert add_cycles(date(2024, 2, 29), parse_cycle("yearly"), 1) == date(2025, 2, 28)
+    assert add_cycles(date(2024, 2, 29), parse_cycle("yearly"), 4) == date(2028, 2, 29)
+
+
+def test_renewal_day():
+    assert renewal_day(date(2025, 2, 28), date(2025, 1, 31)) == 31
+    assert renewal_day(date(2024, 2, 29), date(2024, 1, 30)) == 30
+    assert renewal_day(date(2025, 4, 30), date(2025, 1, 31)) == 31
+    # expire_date moved off the series: its own day wins.
+    assert renewal_day(date(2025, 3, 15), date(2025, 1, 31)) == 15
+    assert renewal_day(date(2025, 2, 28)) == 28
+    assert renewal_day(date(2025, 2, 28), date(2025, 1, 28)) == 28
+    # A day pinned by an earlier renew wins.
+    assert renewal_day(date(2025, 2, 28), None, 29) == 29
+
+
+def _renew(expire: date, billing_cycle: str | None, start_date: date | None, stored: int | None):
+    """One renew as the endpoint does it: returns (new expire_date, stored day)."""
+    day = renewal_day(expire, start_date, stored)
+    return next_renewal(expire, billing_cycle, day), day if parse_cycle(billing_cycle).months else None
+
+
+def test_stepwise_renewal_does_not_drift():
+    rnd = random.Random(2)
+    for _ in range(EXAMPLES // 10):
+        first = _month_end_date(rnd)
+        billing_cycle = rnd.choice(["monthly", "quarterly", "yearly", "2m"])
+        cycle = parse_cycle(billing_cycle)
+        # With a start_date on the series, or with none (the stored day carries it).
+        start_date = rnd.choice([first, None])
+        expire, stored = first, None
+        for k in range(1, 30):
+            expire, stored = _renew(expire, billing_cycle, start_date, stored)
+            assert expire == add_cycles(first, cycle, k)
+
+
+def test_known_stepwise_series():
+    expire, stored = date(2025, 1, 31), None
+    series = []
+    for _ in range(3):
+        expire, stored = _renew(expire, "monthly", None, stored)
+        series.append(expire)
+    assert series == [date(2025, 2, 28), date(2025, 3, 31), date(2025, 4, 30)]
+
+
+def test_renewal_dates_strictly_increase():
+    rnd = random.Random(3)
+    expires = [rnd.choice([_random_date, _month_end_date])(rnd) for _ in range(EXAMPLES)]
+    cycles = [rnd.choice(CYCLES) for _ in expires]
+    starts = [e - timedelta(days=rnd.randint(0, 400)) if rnd.random() < 0.7 else None for e in expires]
+    days = [renewal_day(e, s) for e, s in zip(expires, starts)]
+    for expire, billing_cycle, day, dates in zip(expires, cycles, days, renewal_dates(expires, cycles, 24, days)):
+        assert len(dates) == 24
+        assert all(a < b for a, b in zip([expire] + dates, dates))
+        assert dates[0] == next_renewal(expire, billing_cycle, day)
+        assert dates == [add_cycles(expire, parse_cycle(billing_cycle), k, day) for k in range(1, 25)]
+
+
+def test_occurrences_match_brute_force():
+    rnd = random.Random(4)
+    for _ in range(EXAMPLES):
+        anchor = rnd.choice([_random_date, _month_end_date])(rnd)
+        billing_cycle = rnd.choice(CYCLES)
+        cycle = parse_cycle(billing_cycle)
+        start = anchor + timedelta(days=rnd.randint(-400, 2000))
+        end = start + timedelta(days=rnd.randint(0, 800))
+        max_k = rnd.choice([None, 0, 3])
+        day = rnd.choice([None, 31, anchor.day])
+        expected = []
+        k = 0
+        while max_k is None or k <= max_k:
+            when = add_cycles(anchor, cycle, k, day) if k else anchor
+            if when > end:
+                break
+            if when >= start:
+                expected.append((k, when))
+            k += 1
+        assert occurrences(anchor, billing_cycle, start, end, max_k, day) == expected
+
+
+@pytest.mark.postgres
+def test_next_renewal_expr_matches_python(pg_engine):
+    rnd = random.Random(5)
+    rows = []
+    for i in range(2000):
+        expire = rnd.choice([_random_date, _month_end_date])(rnd)
+        rows.append({
+            "id": uuid.uuid4(),
+            "name": f"s{i}",
+            "cost": 1,
+            "currency": "CNY",
+            "billing_cycle": rnd.choice([c for c in CYCLES if c is not None]),
+            "start_date": expire - timedelta(days=rnd.randint(0, 400)) if rnd.random() < 0.7 else None,
+            "expire_date": expire,
+            "renewal_day": rnd.choice([None, None, 31, 29, expire.day]),
+            "status": "active",
+        })
+    with pg_engine.begin() as conn:
+        conn.execute(insert(Subscription), rows)
+        expr = next_renewal_expr({r["billing_cycle"] for r in rows})
+        got = dict(conn.execute(select(Subscription.id, expr)).all())
+    for r in rows:
+        day = renewal_day(r["expire_date"], r["start_date"], r["renewal_day"])
+        assert got[r["id"]] == next_renewal(r["expire_date"], r["billing_cycle"], day), r
+
+
+@pytest.mark.benchmark
+def test_one_million_projections(report):
+    rnd = random.Random(6)
+    n, per_row = 100_000, 10
+    expires = [_random_date(rnd) for _ in range(n)]
+    cycles = [rnd.choice(CYCLES) for _ in range(n)]
+    starts = [e - timedelta(days=rnd.randint(0, 400)) if rnd.random() < 0.7 else None for e in expires]
+
+    t0 = time.perf_counter()
+    previous = []
+    for expire, billing_cycle, start_date in zip(expires, cycles, starts):
+        dates, current, stored = [], expire, None
+        for _ in range(per_row):
+            current, stored = _renew(current, billing_cycle, start_date, stored)
+            dates.append(current)
+        previous.append(dates)
+    old = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    days = [renewal_day(e, s) for e, s in zip(expires, starts)]
+    projected = renewal_dates(expires, cycles, per_row, days)
+    new = time.perf_counter() - t0
+    assert projected == previous
+    report(f"{n * per_row} renewal projections (stepwise next_renewal vs renewal_dates)", old, new)
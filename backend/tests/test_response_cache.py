@@ -0,0 +1,91 @@
+"""Stats responses: strong ETags, 304 on If-None-Match, invalidation by data version."""
+from datetime import date, timedelta
+
+import pytest
+
+from app.services import calendar_engine, response_cache
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    # Every test database starts at data version "0": keys would collide.
+    response_cache._responses.clear()
+    calendar_engine._month_cache.clear()
+    yield
+    response_cache._responses.clear()
+    calendar_engine._month_cache.clear()
+
+
+async def _subscription(client, **fields) -> dict:
+    body = {"name": "Netflix", "cost": 10, "currency": "CNY", "expire_date": (date.today() + timedelta(days=20)).isoformat()}
+    response = await client.post("/api/subscriptions", json=body | fields)
+    assert response.status_code == 201
+    return response.json()
+
+
+async def test_etag_is_stable_and_answers_304(client, async_engine, count_statements):
+    await _subscription(client)
+    first = await client.get("/api/stats/overview")
+    second = await client.get("/api/stats/overview")
+    assert first.status_code == second.status_code == 200
+    assert first.headers["ETag"] == second.headers["ETag"]
+    assert first.headers["ETag"].startswith('"')
+    assert first.content == second.content
+
+    etag = first.headers["ETag"]
+    with count_statements(async_engine.sync_engine) as statements:
+        for header in (etag, f'"other", {etag}', "*"):
+            response = await client.get("/api/stats/overview", headers={"If-None-Match": header})
+            assert response.status_code == 304
+            assert response.content == b""
+            assert response.headers["ETag"] == etag
+    assert statements == []
+    stale = await client.get("/api/stats/overview", headers={"If-None-Match": '"other"'})
+    assert stale.status_code == 200
+    # Parameters are part of the key.
+    assert (await client.get("/api/stats/costs?months=3")).headers["ETag"] != (
+        await client.get("/api/stats/costs?months=4")
+    ).headers["ETag"]
+
+
+async def test_subscription_write_changes_etag_and_payload(client):
+    await _subscription(client)
+    before = await client.get("/api/stats/overview")
+    await _subscription(client, name="Spotify")
+    after = await client.get("/api/stats/overview", headers={"If-None-Match": before.headers["ETag"]})
+    assert after.status_code == 200
+    assert after.headers["ETag"] != before.headers["ETag"]
+    assert (before.json()["total_services"], after.json()["total_services"]) == (1, 2)
+
+
+async def test_category_write_changes_etag_and_payload(client):
+    category = (await client.post("/api/categories", json={"name": "video", "color": "#FF0000"})).json()
+    sub = await _subscription(client, category_id=category["id"])
+    expire = date.fromisoformat(sub["expire_date"])
+    path = f"/api/stats/calendar?year={expire.year}&month={expire.month}"
+
+    def colors(response):
+        return [c for day in response.json() for c in day["category_colors"]]
+
+    before = await client.get(path)
+    assert colors(before) == ["#FF0000"]
+    response = await client.put(f"/api/categories/{category['id']}", json={"color": "#00FF00"})
+    assert response.status_code == 200
+    after = await client.get(path, headers={"If-None-Match": before.headers["ETag"]})
+    assert after.status_code == 200
+    assert after.headers["ETag"] != before.headers["ETag"]
+    assert colors(after) == ["#00FF00"]
+
+
+async def test_settings_write_changes_etag_and_payload(client):
+    await _subscription(client, currency="USD", cost=10)
+    before = await client.get("/api/stats/overview")
+    assert before.json()["monthly_expense_total"] == "72.00"
+    response = await client.put("/api/settings", json={"exchange_rate": 7.5})
+    assert response.status_code == 200
+    after = await client.get("/api/stats/overview", headers={"If-None-Match": before.headers["ETag"]})
+    assert after.status_code == 200
+    assert after.headers["ETag"] != before.headers["ETag"]
+    assert after.json()["monthly_expense_total"] == "75.00"
@@ -0,0 +1,204 @@
+"""Scheduler jobs: reminder candidates and claims, the nightly status refresh."""
+import threading
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, insert, null, select, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app import scheduler
+from app.config import settings
+from app.models.notification import Notification
+from app.models.subscription import Subscription
+from app.scheduler import _claim_chunk_size, _claim_reminders, _reminder_candidates
+from app.services.settings_repo import set_settings_many
+from app.services.subscription_status import compute_status
+from app.services.telegram import PER_CHAT_INTERVAL
+
+
+class _Recorder:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, stmt):
+        self.statements.append(stmt)
+        return []
+
+
+def test_claim_reclaims_pending_rows_after_the_lease():
+    db = _Recorder()
+    _claim_reminders(db, {(uuid.uuid4(), "3d", date(2030, 1, 1)): "msg"})
+    sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+    where = sql.split("ON CONFLICT", 1)[1].split("WHERE", 1)[1]
+    assert "notifications.success IS false" in where
+    assert "notifications.error_message !=" in where
+    assert "notifications.sent_at < now() - make_interval(" in where
+
+
+def _subscription(expire_date: date, notify_days, name: str = "s") -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "name": name,
+        "cost": 1,
+        "currency": "CNY",
+        "billing_cycle": "monthly",
+        "expire_date": expire_date,
+        "status": "active",
+        "notify_days": notify_days,
+    }
+
+
+@pytest.mark.postgres
+def test_reminder_candidates_honour_notify_days(pg_engine):
+    today = date.today()
+    rows = {
+        # Own list: reminded on its own days only.
+        "own_hit": _subscription(today + timedelta(days=5), [5, 2]),
+        "own_miss": _subscription(today + timedelta(days=3), [5, 2]),
+        # SQL NULL and JSON null fall back to the default list.
+        "sql_null_hit": _subscription(today + timedelta(days=3), null()),
+        "json_null_hit": _subscription(today + timedelta(days=7), None),
+        "default_miss": _subscription(today + timedelta(days=5), null()),
+        # An explicit empty list opts out.
+        "opted_out": _subscription(today + timedelta(days=3), []),
+        "expired": _subscription(today - timedelta(days=1), [1]),
+        "today": _subscription(today, [0]),
+    }
+    with pg_engine.begin() as conn:
+        for row in rows.values():
+            # One by one: null() (SQL NULL, not JSON null) is an expression.
+            conn.execute(insert(Subscription).values(row))
+    with Session(pg_engine) as db:
+        candidates = _reminder_candidates(db, today, [7, 3, 1])
+    names = {r["id"]: name for name, r in rows.items()}
+    assert {names[sub_id]: days for sub_id, _, _, days in candidates} == {
+        "own_hit": 5,
+        "sql_null_hit": 3,
+        "json_null_hit": 7,
+        "today": 0,
+    }
+
+
+@pytest.fixture
+def pg_subscriptions(pg_engine):
+    rows = [_subscription(date.today() + timedelta(days=3), None, f"s{i}") for i in range(4)]
+    with pg_engine.begin() as conn:
+        conn.execute(insert(Subscription), rows)
+    return [r["id"] for r in rows]
+
+
+def _messages(sub_ids) -> dict[tuple, str]:
+    return {(sub_id, "3d", date.today() + timedelta(days=3)): f"msg {sub_id}" for sub_id in sub_ids}
+
+
+def _claim(pg_engine, messages) -> set:
+    with Session(pg_engine) as db:
+        claimed = _claim_reminders(db, messages)
+        db.commit()
+    return {key[0] for _, key in claimed}
+
+
+@pytest.mark.postgres
+def test_claim_skips_sent_and_in_flight_reminders(pg_engine, pg_subscriptions):
+    messages = _messages(pg_subscriptions)
+    assert _claim(pg_engine, messages) == set(pg_subscriptions)
+    # Still pending within the lease: in flight elsewhere.
+    assert _claim(pg_engine, messages) == set()
+    with pg_engine.begin() as conn:
+        conn.execute(update(Notification).values(success=True, error_message=None))
+    assert _claim(pg_engine, messages) == set()
+
+
+@pytest.mark.postgres
+def test_claim_retakes_failed_and_expired_claims(pg_engine, pg_subscriptions):
+    failed, expired, fresh, sent = pg_subscriptions
+    messages = _messages(pg_subscriptions)
+    _claim(pg_engine, messages)
+    with pg_engine.begin() as conn:
+        conn.execute(
+            update(Notification)
+            .where(Notification.subscription_id == failed)
+            .values(success=False, error_message="HTTP 500")
+        )
+        conn.execute(
+            update(Notification)
+            .where(Notification.subscription_id == expired)
+            .values(sent_at=func.now() - timedelta(seconds=settings.reminder_claim_lease_seconds + 60))
+        )
+        conn.execute(update(Notification).where(Notification.subscription_id == sent).values(success=True))
+    assert _claim(pg_engine, messages) == {failed, expired}
+
+
+@pytest.mark.postgres
+def test_concurrent_claims_are_disjoint(pg_engine, pg_subscriptions):
+    first, second = pg_subscriptions[:3], pg_subscriptions[1:]
+    results = {}
+    with Session(pg_engine) as db:
+        results["first"] = {key[0] for _, key in _claim_reminders(db, _messages(first))}
+        # The second claimer blocks on the first one's uncommitted rows.
+        thread = threading.Thread(target=lambda: results.setdefault("second", _claim(pg_engine, _messages(second))))
+        thread.start()
+        thread.join(0.5)
+        assert thread.is_alive()
+        db.commit()
+    thread.join(10)
+    assert results["first"] == set(first)
+    assert results["second"] == set(second) - set(first)
+
+
+def test_claim_chunks_fit_in_the_lease():
+    assert _claim_chunk_size() * PER_CHAT_INTERVAL <= settings.reminder_claim_lease_seconds / 2
+
+
+def test_reminders_are_claimed_chunk_by_chunk(sync_engine, monkeypatch):
+    set_settings_many({"telegram_bot_token": "token", "telegram_chat_id": "42"})
+    today = date.today()
+    candidates = [(uuid.uuid4(), f"s{i}", today + timedelta(days=3), 3) for i in range(7)]
+    events = []
+
+    def claim(db, messages):
+        # _claim_reminders without ON CONFLICT, which SQLite spells differently.
+        events.append(("claim", len(messages)))
+        rows = {key: Notification(
+            id=uuid.uuid4(), subscription_id=key[0], notify_type=key[1], target_date=key[2], error_message="pending"
+        ) for key in messages}
+        db.add_all(rows.values())
+        db.flush()
+        return [(n.id, key) for key, n in rows.items()]
+
+    def send(messages, bot_token):
+        events.append(("send", len(messages)))
+        return [(True, "")] * len(messages)
+
+    monkeypatch.setattr(scheduler, "_reminder_candidates", lambda db, today, default_days: candidates)
+    monkeypatch.setattr(scheduler, "_claim_reminders", claim)
+    monkeypatch.setattr(scheduler, "send_telegram_batch", send)
+    monkeypatch.setattr(scheduler, "_claim_chunk_size", lambda: 3)
+    assert scheduler._send_reminders() == {"sent": 7, "failed": 0}
+    assert events == [("claim", 3), ("send", 3), ("claim", 3), ("send", 3), ("claim", 1), ("send", 1)]
+    with Session(sync_engine) as db:
+        assert db.scalars(select(Notification.success)).all() == [True] * 7
+
+
+def test_refresh_statuses_rewrites_stale_rows_only(sync_engine):
+    today = date.today()
+    edited = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    subs = [
+        _subscription(today - timedelta(days=1), None, "stale expired"),
+        _subscription(today + timedelta(days=2), None, "stale expiring"),
+        _subscription(today + timedelta(days=30), None, "current"),
+    ]
+    subs[1]["status"] = "expiring-soon"
+    with sync_engine.begin() as conn:
+        conn.execute(insert(Subscription), [s | {"updated_at": edited} for s in subs])
+
+    assert scheduler._refresh_statuses() == 2
+    with Session(sync_engine) as db:
+        rows = {s.name: s for s in db.scalars(select(Subscription))}
+    for sub in subs:
+        assert rows[sub["name"]].status == compute_status(sub["expire_date"], today)
+        # Bookkeeping, not an edit: updated_at is kept.
+        assert rows[sub["name"]].updated_at.replace(tzinfo=timezone.utc) == edited
+    assert scheduler._refresh_statuses() == 0
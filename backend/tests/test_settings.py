@@ -0,0 +1,20 @@
+"""Settings validation."""
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.setting import SettingsUpdate
+
+
+@pytest.mark.parametrize("value, expected", [("09:00", "09:00"), ("9:05", "09:05"), ("23:59", "23:59"), (" 00:00 ", "00:00")])
+def test_notify_time_accepts_hh_mm(value, expected):
+    assert SettingsUpdate(notify_time=value).notify_time == expected
+
+
+@pytest.mark.parametrize("value", ["9am", "25:00", "12:60", "12", "12:5", "", "-1:00"])
+def test_notify_time_rejects_invalid(value):
+    with pytest.raises(ValidationError):
+        SettingsUpdate(notify_time=value)
+
+
+def test_notify_time_may_be_omitted():
+    assert SettingsUpdate().notify_time is None
@@ -0,0 +1,41 @@
+"""Settings cache: invalidation never waits for a reload and is never lost."""
+import threading
+
+from sqlalchemy import event
+
+from app.services import settings_repo
+from app.services.settings_repo import _SettingsCache, set_settings_many
+
+
+def test_invalidate_does_not_wait_for_a_reload(sync_engine):
+    cache = _SettingsCache(60)
+    done = threading.Event()
+    with cache._lock:  # a reload in progress
+        threading.Thread(target=lambda: (cache.invalidate(), done.set())).start()
+        assert done.wait(1)
+
+
+def test_invalidate_during_reload_is_not_lost(sync_engine):
+    set_settings_many({"notify_time": "09:00"})
+    cache = _SettingsCache(60)
+
+    def invalidate(*args):
+        cache.invalidate()
+
+    event.listen(sync_engine, "before_cursor_execute", invalidate)
+    try:
+        assert cache.get_all()["notify_time"] == "09:00"
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", invalidate)
+    # The reload raced with an invalidation, so its result was not kept.
+    assert cache.fresh() is None
+    cache.get_all()
+    assert cache.fresh() is not None
+    assert cache.misses == 2
+
+
+def test_module_cache_sees_writes(sync_engine):
+    set_settings_many({"notify_time": "08:30"})
+    assert settings_repo.get_setting("notify_time") == "08:30"
+    set_settings_many({"notify_time": "10:15"})
+    assert settings_repo.get_setting("notify_time") == "10:15"
@@ -0,0 +1,83 @@
+"""/stats/costs: the single-scan series against the previous per-month queries."""
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.models.subscription import Subscription
+from app.routers.stats import _costs
+
+pytestmark = pytest.mark.anyio
+
+
+def previous_costs(db: Session, months: int) -> list[dict]:
+    """The cost trend as computed before: one query and one loop per month.
+
+    Kept as it was apart from the float multipliers (Decimal * float raises);
+    only CNY and USD rows are compared.
+    """
+    today = date.today()
+    result = []
+    for i in range(months - 1, -1, -1):
+        m = today.month - 1 - i
+        y = today.year
+        while m < 0:
+            m += 12
+            y -= 1
+        month_start = date(y, m + 1, 1)
+        if m == 11:
+            month_end = date(y, 12, 31)
+        else:
+            month_end = date(y, m + 2, 1) - timedelta(days=1)
+        subs = db.query(Subscription).filter(
+            Subscription.expire_date >= month_start,
+            or_(Subscription.start_date.is_(None), Subscription.start_date <= month_end),
+        ).all()
+        cny = Decimal("0")
+        usd = Decimal("0")
+        for s in subs:
+            divisor = 1
+            if s.billing_cycle == "yearly":
+                divisor = 12
+            elif s.billing_cycle == "quarterly":
+                divisor = 3
+            if s.currency == "CNY":
+                cny += s.cost / divisor
+            elif s.currency == "USD":
+                usd += s.cost / divisor
+        result.append({"month": f"{month_start.month}月", "cny": round(cny, 2), "usd": round(usd, 2)})
+    return result
+
+
+def _assert_same(previous: list[dict], current) -> None:
+    assert [p.month for p in current] == [p["month"] for p in previous]
+    for old, new in zip(previous, current):
+        assert abs(new.cny - old["cny"]) <= Decimal("0.01")
+        assert abs(new.usd - old["usd"]) <= Decimal("0.01")
+
+
+@pytest.mark.parametrize("months", [1, 6, 24])
+async def test_costs_match_previous_loop(months, sync_engine, db, seed_subscriptions):
+    seed_subscriptions(500)
+    with Session(sync_engine) as sync_db:
+        previous = previous_costs(sync_db, months)
+    _assert_same(previous, await _costs(db, months))
+
+
+@pytest.mark.benchmark
+async def test_costs_benchmark(sync_engine, db, seed_subscriptions, report):
+    seed_subscriptions(10_000)
+    await _costs(db, 1)  # warm the settings cache
+    for months in range(1, 25):
+        with Session(sync_engine) as sync_db:
+            t0 = time.perf_counter()
+            previous = previous_costs(sync_db, months)
+            old = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        current = await _costs(db, months)
+        new = time.perf_counter() - t0
+        _assert_same(previous, current)
+        report(f"costs, 10000 rows, months={months}", old, new)
@@ -0,0 +1,104 @@
+"""/stats/forecast: monthly payments per currency and category, converted to the base currency."""
+from calendar import monthrange
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.services import response_cache
+from app.services.renewal import next_renewal, renewal_day
+
+pytestmark = pytest.mark.anyio
+
+MONTHS = 4
+RATES = {"CNY": Decimal(1), "USD": Decimal("7.2"), "EUR": Decimal(8)}
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    # Every test database starts at data version "0": keys would collide.
+    response_cache._responses.clear()
+    yield
+    response_cache._responses.clear()
+
+
+def _expected(subs: list[dict], today: date) -> list[dict]:
+    """Per month: renewals stepped with next_renewal, converted with RATES."""
+    year, month0 = divmod(today.year * 12 + today.month - 1 + MONTHS - 1, 12)
+    end = date(year, month0 + 1, monthrange(year, month0 + 1)[1])
+    months = [
+        {"payments": 0, "by_currency": defaultdict(Decimal), "by_category": defaultdict(Decimal)}
+        for _ in range(MONTHS)
+    ]
+    for sub in subs:
+        expire = sub["expire_date"]
+        if expire < today:
+            continue
+        day = renewal_day(expire)
+        when = expire
+        while when <= end:
+            month = months[(when.year - today.year) * 12 + when.month - today.month]
+            month["payments"] += 1
+            month["by_currency"][sub["currency"]] += sub["cost"]
+            if sub["currency"] in RATES:
+                month["by_category"][sub["category"] or "uncategorized"] += sub["cost"] * RATES[sub["currency"]]
+            when = next_renewal(when, sub["billing_cycle"], day)
+    return months
+
+
+def _decimals(amounts: dict) -> dict:
+    return {k: Decimal(v) for k, v in amounts.items()}
+
+
+async def test_forecast_mixes_currencies_cycles_and_categories(client):
+    today = date.today()
+    response = await client.put("/api/settings", json={"exchange_rate": 7.2, "exchange_rates": {"EUR": 8}})
+    assert response.status_code == 200
+    video = (await client.post("/api/categories", json={"name": "video"})).json()["id"]
+    music = (await client.post("/api/categories", json={"name": "music"})).json()["id"]
+    subs = [
+        # Two rows in one (currency, category, cycle, date) group.
+        {"name": "a1", "cost": Decimal("30"), "currency": "CNY", "billing_cycle": "monthly", "category": video, "days": 5},
+        {"name": "a2", "cost": Decimal("12.5"), "currency": "CNY", "billing_cycle": "monthly", "category": video, "days": 5},
+        {"name": "b", "cost": Decimal("10"), "currency": "USD", "billing_cycle": "yearly", "category": video, "days": 10},
+        {"name": "c", "cost": Decimal("5"), "currency": "EUR", "billing_cycle": "14d", "category": None, "days": 0},
+        {"name": "d", "cost": Decimal("20"), "currency": "USD", "billing_cycle": "quarterly", "category": music, "days": 40},
+        # No rate: counted in by_currency and payments, left out of the totals.
+        {"name": "e", "cost": Decimal("1000"), "currency": "JPY", "billing_cycle": "monthly", "category": music, "days": 3},
+        # Lapsed, and first due after the range: no payments.
+        {"name": "f", "cost": Decimal("99"), "currency": "CNY", "billing_cycle": "monthly", "category": None, "days": -1},
+        {"name": "g", "cost": Decimal("99"), "currency": "CNY", "billing_cycle": "monthly", "category": None, "days": 200},
+    ]
+    for sub in subs:
+        sub["expire_date"] = today + timedelta(days=sub.pop("days"))
+        response = await client.post("/api/subscriptions", json={
+            "name": sub["name"],
+            "cost": str(sub["cost"]),
+            "currency": sub["currency"],
+            "billing_cycle": sub["billing_cycle"],
+            "category_id": sub["category"],
+            "expire_date": sub["expire_date"].isoformat(),
+        })
+        assert response.status_code == 201
+
+    response = await client.get(f"/api/stats/forecast?months={MONTHS}")
+    assert response.status_code == 200
+    forecast = response.json()
+    assert forecast["currency"] == "CNY"
+    assert forecast["unconverted_currencies"] == ["JPY"]
+
+    expected = _expected(subs, today)
+    assert [m["month"] for m in forecast["months"]] == [
+        f"{year}-{month0 + 1:02d}"
+        for year, month0 in (divmod(today.year * 12 + today.month - 1 + i, 12) for i in range(MONTHS))
+    ]
+    for got, want in zip(forecast["months"], expected):
+        assert got["payments"] == want["payments"], got["month"]
+        assert _decimals(got["by_currency"]) == {c: a.quantize(Decimal("0.01")) for c, a in want["by_currency"].items()}
+        assert _decimals(got["by_category"]) == {c: a.quantize(Decimal("0.01")) for c, a in want["by_category"].items()}
+        assert Decimal(got["total"]) == sum(want["by_category"].values(), Decimal(0)).quantize(Decimal("0.01"))
+    assert Decimal(forecast["total"]) == sum(Decimal(m["total"]) for m in forecast["months"])
+    # The 14-day EUR row is due today: 5 EUR -> 40 CNY at least.
+    assert Decimal(forecast["months"][0]["by_category"]["uncategorized"]) >= 40
+    assert all(set(m["by_category"]) <= {video, music, "uncategorized"} for m in forecast["months"])
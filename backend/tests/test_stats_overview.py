@@ -0,0 +1,80 @@
+"""/stats/overview: the grouped query against the previous per-row loop."""
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models.subscription import Subscription
+from app.routers.stats import _overview
+from app.services.subscription_status import compute_status
+
+pytestmark = pytest.mark.anyio
+
+
+def previous_overview(db: Session) -> dict:
+    """The overview as computed before the grouped query: load every row, loop.
+
+    Kept as it was apart from the multipliers, which were floats (Decimal *
+    float raises); only CNY and USD rows are compared.
+    """
+    today = date.today()
+    end_of_month = (today.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    subs = db.query(Subscription).all()
+    total = len(subs)
+    expiring_this_month = sum(1 for s in subs if today <= s.expire_date <= end_of_month)
+    monthly_cny = Decimal("0")
+    monthly_usd = Decimal("0")
+    for s in subs:
+        if compute_status(s.expire_date) == "expired":
+            continue
+        divisor = 1
+        if s.billing_cycle == "yearly":
+            divisor = 12
+        elif s.billing_cycle == "quarterly":
+            divisor = 3
+        if s.currency == "CNY":
+            monthly_cny += s.cost / divisor
+        elif s.currency == "USD":
+            monthly_usd += s.cost / divisor
+    active = sum(1 for s in subs if compute_status(s.expire_date) == "active")
+    return {
+        "total_services": total,
+        "expiring_this_month": expiring_this_month,
+        "monthly_expense_cny": round(monthly_cny, 2),
+        "monthly_expense_usd": round(monthly_usd, 2),
+        "active_services": active,
+    }
+
+
+def _assert_same(previous: dict, current) -> None:
+    assert current.total_services == previous["total_services"]
+    assert current.expiring_this_month == previous["expiring_this_month"]
+    assert current.active_services == previous["active_services"]
+    # Per-row division rounds each term; the grouped sum divides once.
+    assert abs(current.monthly_expense_cny - previous["monthly_expense_cny"]) <= Decimal("0.01")
+    assert abs(current.monthly_expense_usd - previous["monthly_expense_usd"]) <= Decimal("0.01")
+
+
+async def test_overview_matches_previous_loop(sync_engine, db, seed_subscriptions):
+    seed_subscriptions(500)
+    with Session(sync_engine) as sync_db:
+        previous = previous_overview(sync_db)
+    _assert_same(previous, await _overview(db))
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("rows", [1_000, 10_000, 100_000])
+async def test_overview_benchmark(rows, sync_engine, db, seed_subscriptions, report):
+    seed_subscriptions(rows)
+    with Session(sync_engine) as sync_db:
+        t0 = time.perf_counter()
+        previous = previous_overview(sync_db)
+        old = time.perf_counter() - t0
+    await _overview(db)  # warm the settings cache and statement cache
+    t0 = time.perf_counter()
+    current = await _overview(db)
+    new = time.perf_counter() - t0
+    _assert_same(previous, current)
+    report(f"overview, {rows} rows", old, new)
@@ -0,0 +1,160 @@
+"""POST /subscriptions/bulk: renew / delete / set_category / update in one transaction."""
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.models.subscription import Subscription
+
+pytestmark = pytest.mark.anyio
+
+
+def _subscription(expire_date: date, billing_cycle: str = "monthly", **extra) -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "name": "s",
+        "cost": 1,
+        "currency": "CNY",
+        "billing_cycle": billing_cycle,
+        "expire_date": expire_date,
+        "status": "active",
+        "start_date": None,
+        "renewal_day": None,
+        **extra,
+    }
+
+
+def _insert(engine, *subs: dict) -> None:
+    with engine.begin() as conn:
+        conn.execute(insert(Subscription), list(subs))
+
+
+def _rows(engine) -> dict[uuid.UUID, dict]:
+    with engine.connect() as conn:
+        return {r.id: r._asdict() for r in conn.execute(select(Subscription))}
+
+
+async def _bulk(client, *operations: dict):
+    body = {"operations": [{**op, "ids": [str(i) for i in op["ids"]]} for op in operations]}
+    return await client.post("/api/subscriptions/bulk", json=body)
+
+
+@pytest.mark.parametrize("field", ["name", "cost", "currency", "billing_cycle", "expire_date"])
+async def test_update_rejects_null_for_required_columns(client, sync_engine, field):
+    sub = _subscription(date.today() + timedelta(days=30))
+    _insert(sync_engine, sub)
+    response = await _bulk(client, {"action": "update", "ids": [sub["id"]], "changes": {field: None}})
+    assert response.status_code == 422
+    assert field in response.text
+    assert _rows(sync_engine)[sub["id"]][field] is not None
+    # Nullable columns may still be cleared.
+    response = await _bulk(client, {"action": "update", "ids": [sub["id"]], "changes": {"notes": None, "url": None}})
+    assert response.status_code == 200
+
+
+async def test_duplicate_ids_count_once_and_missing_ids_are_reported(client, sync_engine):
+    a, b = (_subscription(date.today() + timedelta(days=30)) for _ in range(2))
+    _insert(sync_engine, a, b)
+    missing = uuid.uuid4()
+    response = await _bulk(client, {"action": "delete", "ids": [a["id"], a["id"], missing, b["id"], missing]})
+    assert response.status_code == 200
+    assert response.json()["results"] == [
+        {"action": "delete", "requested": 3, "affected": 2, "not_found": [str(missing)]}
+    ]
+    assert _rows(sync_engine) == {}
+
+
+async def test_update_resets_renewal_day_only_where_date_or_cycle_changes(client, sync_engine):
+    today = date.today()
+    target = today + timedelta(days=2)
+    moved = _subscription(today + timedelta(days=40), renewal_day=31)
+    already_there = _subscription(target, renewal_day=31)
+    recycled = _subscription(today + timedelta(days=40), renewal_day=31)
+    same_cycle = _subscription(today + timedelta(days=40), "yearly", renewal_day=31)
+    _insert(sync_engine, moved, already_there, recycled, same_cycle)
+
+    response = await _bulk(
+        client,
+        {"action": "update", "ids": [moved["id"], already_there["id"]], "changes": {"expire_date": target.isoformat()}},
+        {"action": "update", "ids": [recycled["id"], same_cycle["id"]], "changes": {"billing_cycle": "yearly"}},
+    )
+    assert response.status_code == 200
+    rows = _rows(sync_engine)
+    assert rows[moved["id"]]["renewal_day"] is None
+    assert rows[already_there["id"]]["renewal_day"] == 31
+    assert rows[recycled["id"]]["renewal_day"] is None
+    assert rows[same_cycle["id"]]["renewal_day"] == 31
+    # The new date also sets the status.
+    assert rows[moved["id"]]["expire_date"] == target
+    assert rows[moved["id"]]["status"] == "expiring"
+
+
+@pytest.mark.parametrize("failing", [
+    {"action": "set_category", "category_id": str(uuid.uuid4())},
+    {"action": "update", "changes": {"category_id": str(uuid.uuid4())}},
+    {"action": "update", "changes": {}},
+])
+async def test_failing_operation_rolls_back_earlier_ones(client, sync_engine, failing):
+    a, b = (_subscription(date.today() + timedelta(days=30)) for _ in range(2))
+    _insert(sync_engine, a, b)
+    before = _rows(sync_engine)
+    response = await _bulk(
+        client,
+        {"action": "delete", "ids": [a["id"]]},
+        {"action": "update", "ids": [b["id"]], "changes": {"name": "renamed"}},
+        {**failing, "ids": [b["id"]]},
+    )
+    assert response.status_code in (400, 404)
+    assert _rows(sync_engine) == before
+
+
+@pytest.mark.postgres
+async def test_renew_matches_single_row_renew(pg_engine):
+    """Bulk renew (SQL date arithmetic) against renew's next_renewal, row by row."""
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    from app.routers.subscriptions import _apply_bulk
+    from app.schemas.subscription import BulkOperation
+    from app.services.renewal import next_renewal, parse_cycle, renewal_day
+    from app.services.subscription_status import compute_status
+
+    today = date.today()
+    subs = [
+        _subscription(date(2031, 1, 31)),
+        _subscription(date(2031, 2, 28), start_date=date(2030, 12, 31)),
+        _subscription(date(2031, 2, 28), renewal_day=30),
+        _subscription(date(2032, 2, 29), "yearly"),
+        _subscription(date(2031, 11, 30), "quarterly", start_date=date(2031, 5, 31)),
+        _subscription(date(2031, 8, 31), "6m"),
+        _subscription(date(2031, 3, 10), "14d", renewal_day=31),
+        _subscription(date(2031, 3, 10), "2w"),
+        _subscription(today + timedelta(days=1), "7d"),
+        _subscription(today - timedelta(days=5)),
+    ]
+    _insert(pg_engine, *subs)
+    with pg_engine.connect() as conn:
+        schema = conn.exec_driver_sql("SELECT current_schema()").scalar()
+    engine = create_async_engine(
+        pg_engine.url.set(drivername="postgresql+asyncpg"),
+        connect_args={"server_settings": {"search_path": schema}},
+    )
+    try:
+        async with AsyncSession(engine) as db:
+            op = BulkOperation(action="renew", ids=[s["id"] for s in subs])
+            result = await _apply_bulk(db, op, today)
+            await db.commit()
+    finally:
+        await engine.dispose()
+    assert result.affected == len(subs)
+
+    rows = _rows(pg_engine)
+    for sub in subs:
+        day = renewal_day(sub["expire_date"], sub["start_date"], sub["renewal_day"])
+        expire = next_renewal(sub["expire_date"], sub["billing_cycle"], day)
+        expected = {
+            "expire_date": expire,
+            "renewal_day": day if parse_cycle(sub["billing_cycle"]).months else None,
+            "status": compute_status(expire, today),
+        }
+        assert {k: rows[sub["id"]][k] for k in expected} == expected, sub
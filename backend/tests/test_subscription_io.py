@@ -0,0 +1,55 @@
+"""Subscription import: bad encodings and malformed CSV are 422s, not 500s."""
+import csv
+import io
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models.subscription import Subscription
+from app.services.subscription_io import ImportFailed, import_subscriptions
+
+pytestmark = pytest.mark.anyio
+
+HEADER = "name,cost,currency,billing_cycle,expire_date,notify_days\r\n"
+
+
+async def _count(db) -> int:
+    return await db.scalar(select(func.count(Subscription.id)))
+
+
+async def test_csv_import(db):
+    data = ("﻿" + HEADER + "Netflix,15.99,USD,monthly,2030-01-31,\"7,1\"\r\n" + "云盘,98,CNY,yearly,2030-06-01,\r\n")
+    assert await import_subscriptions(db, io.BytesIO(data.encode()), "csv") == 2
+    await db.commit()
+    assert await _count(db) == 2
+
+
+async def test_non_utf8_csv_reports_the_line(db):
+    data = (HEADER + "Netflix,15.99,USD,monthly,2030-01-31,\r\n").encode() + "云盘,98,CNY,yearly,2030-06-01,\r\n".encode("gbk")
+    with pytest.raises(ImportFailed) as exc:
+        await import_subscriptions(db, io.BytesIO(data), "csv")
+    assert [e["line"] for e in exc.value.errors] == [3]
+    assert "UTF-8" in exc.value.errors[0]["error"]
+
+
+async def test_invalid_byte_in_jsonl_reports_the_line(db):
+    data = b'{"name": "a", "expire_date": "2030-01-01"}\n\n{"name": "b\xff", "expire_date": "2030-01-01"}\n'
+    with pytest.raises(ImportFailed) as exc:
+        await import_subscriptions(db, io.BytesIO(data), "jsonl")
+    assert [e["line"] for e in exc.value.errors] == [3]
+
+
+async def test_malformed_csv_is_reported(db):
+    huge = "x" * (csv.field_size_limit() + 1)
+    data = (HEADER + "Netflix,15.99,USD,monthly,2030-01-31,\r\n" + f"{huge},1,CNY,monthly,2030-01-31,\r\n").encode()
+    with pytest.raises(ImportFailed) as exc:
+        await import_subscriptions(db, io.BytesIO(data), "csv")
+    assert exc.value.errors[0]["line"] == 3
+    assert exc.value.errors[0]["error"].startswith("malformed CSV")
+
+
+async def test_quoted_newlines_keep_line_numbers(db):
+    data = (HEADER + "\"Multi\r\nline\",1,CNY,monthly,2030-01-31,\r\n" + "Broken,1,CNY,monthly,not-a-date,\r\n").encode()
+    with pytest.raises(ImportFailed) as exc:
+        await import_subscriptions(db, io.BytesIO(data), "csv")
+    assert [e["line"] for e in exc.value.errors] == [4]
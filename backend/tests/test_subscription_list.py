@@ -0,0 +1,97 @@
+"""GET /subscriptions: keyset pagination and the SQL status filter."""
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from app.models.subscription import Subscription
+from app.services.subscription_status import STATUSES, compute_status, status_expire_range
+
+pytestmark = pytest.mark.anyio
+
+
+def _seed(sync_engine, expire_dates: list[date]) -> list[uuid.UUID]:
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "name": f"s{i}",
+            "cost": 1,
+            "currency": "CNY",
+            "billing_cycle": "monthly",
+            "expire_date": expire,
+            "status": "active",
+        }
+        for i, expire in enumerate(expire_dates)
+    ]
+    with sync_engine.begin() as conn:
+        conn.execute(insert(Subscription), rows)
+    return [r["id"] for r in rows]
+
+
+async def _walk(client, limit: int, **params) -> list[list[dict]]:
+    pages = []
+    cursor = None
+    while True:
+        query = dict(params, limit=limit, **({"cursor": cursor} if cursor else {}))
+        response = await client.get("/api/subscriptions", params=query)
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return pages
+        assert len(pages[-1]) == limit
+
+
+@pytest.mark.parametrize("limit", [1, 3, 7, 50])
+async def test_pages_have_no_duplicates_or_gaps(limit, client, sync_engine):
+    # Runs of equal expire_date straddle page boundaries; id breaks the ties.
+    today = date.today()
+    ids = _seed(sync_engine, [today + timedelta(days=i // 5) for i in range(23)])
+    pages = await _walk(client, limit)
+    walked = [item for page in pages for item in page]
+    assert len(walked) == len(set(i["id"] for i in walked)) == 23
+    assert {uuid.UUID(i["id"]) for i in walked} == set(ids)
+    keys = [(i["expire_date"], uuid.UUID(i["id"])) for i in walked]
+    assert keys == sorted(keys)
+    assert walked == (await client.get("/api/subscriptions")).json()
+
+
+async def test_last_page_has_no_cursor(client, sync_engine):
+    _seed(sync_engine, [date.today()] * 4)
+    response = await client.get("/api/subscriptions", params={"limit": 4})
+    assert len(response.json()) == 4
+    assert "X-Next-Cursor" not in response.headers
+    response = await client.get("/api/subscriptions", params={"limit": 3})
+    assert "X-Next-Cursor" in response.headers
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "bm8tc2VwYXJhdG9y", "MjAzMC0wMS0wMXxub3QtYS11dWlk", "eHx5"])
+async def test_malformed_cursor_is_400(cursor, client):
+    response = await client.get("/api/subscriptions", params={"limit": 10, "cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+async def test_status_filter_matches_compute_status(client, sync_engine):
+    today = date.today()
+    expire_dates = [today + timedelta(days=d) for d in range(-3, 12)]
+    ids = dict(zip(_seed(sync_engine, expire_dates), expire_dates))
+    for status in STATUSES:
+        expected = {str(i) for i, expire in ids.items() if compute_status(expire, today) == status}
+        listed = [item for page in await _walk(client, 2, status=status) for item in page]
+        assert {item["id"] for item in listed} == expected, status
+        assert all(item["status"] == status for item in listed)
+    assert (await client.get("/api/subscriptions", params={"status": "bogus"})).json() == []
+
+
+def test_status_expire_range_partitions_the_dates():
+    today = date(2026, 2, 27)
+    for offset in range(-30, 30):
+        expire = today + timedelta(days=offset)
+        matching = []
+        for status in STATUSES:
+            lower, upper = status_expire_range(status, today)
+            if (lower is None or expire >= lower) and (upper is None or expire <= upper):
+                matching.append(status)
+        assert matching == [compute_status(expire, today)], expire
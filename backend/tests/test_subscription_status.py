@@ -0,0 +1,34 @@
+"""status_expr (SQL) against compute_status (Python) around every threshold."""
+import uuid
+from datetime import date, timedelta
+
+from sqlalchemy import insert, select
+
+from app.models.subscription import Subscription
+from app.services.subscription_status import (
+    EXPIRING_DAYS,
+    EXPIRING_SOON_DAYS,
+    compute_status,
+    status_expr,
+)
+
+BOUNDARIES = sorted({
+    offset
+    for threshold in (-1, 0, EXPIRING_DAYS, EXPIRING_SOON_DAYS)
+    for offset in (threshold - 1, threshold, threshold + 1)
+})
+
+
+def test_status_expr_agrees_with_compute_status_at_the_boundaries(sync_engine):
+    today = date(2030, 3, 1)
+    subs = {uuid.uuid4(): today + timedelta(days=offset) for offset in BOUNDARIES}
+    with sync_engine.begin() as conn:
+        conn.execute(insert(Subscription), [
+            {"id": i, "name": "s", "cost": 1, "currency": "CNY", "billing_cycle": "monthly",
+             "expire_date": expire, "status": "active"}
+            for i, expire in subs.items()
+        ])
+        got = dict(conn.execute(select(Subscription.id, status_expr(today))).all())
+    expected = {i: compute_status(expire, today) for i, expire in subs.items()}
+    assert got == expected
+    assert set(expected.values()) == {"expired", "expiring", "expiring-soon", "active"}
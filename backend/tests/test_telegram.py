@@ -0,0 +1,33 @@
+"""TelegramDelivery pacing: a 429 pauses every pending send."""
+import time
+
+import httpx
+import pytest
+
+from app.services.telegram import TelegramDelivery
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_429_blocks_every_pending_send():
+    posts: list[float] = []
+    blocked: list[float] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        now = time.monotonic()
+        posts.append(now)
+        if len(posts) == 3:
+            blocked.append(now)
+            return httpx.Response(429, json={"ok": False, "parameters": {"retry_after": 0.3}})
+        return httpx.Response(200, json={"ok": True})
+
+    async with TelegramDelivery("token", per_chat_interval=0.0, global_interval=0.01, max_retries=1) as delivery:
+        await delivery._client.aclose()
+        delivery._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        results = await delivery.send_many([(f"chat{i}", "hi") for i in range(20)])
+
+    assert all(ok for ok, _ in results)
+    assert len(posts) == 21
+    resume = blocked[0] + 0.3
+    during = [t for t in posts if blocked[0] < t < resume]
+    assert during == []